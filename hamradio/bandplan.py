@@ -27,16 +27,24 @@
 # SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 # ****************************************************************************
 
+import os
 import sys
-from bisect import bisect_right
+from glob             import glob
+from bisect           import bisect_right
+from rsclib.autosuper import autosuper
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
-class Band:
+class Band (autosuper):
 
     def __init__ (self, bandplan, name, f_start, f_end):
-        self.name    = name
-        self.f_start = f_start
-        self.f_end   = f_end
-        self.plan    = bandplan
+        self.name     = name
+        self.f_start  = f_start
+        self.f_end    = f_end
+        self.plan     = bandplan
+        self.segments = []
     # end def __init__
 
     def __str__ (self):
@@ -48,7 +56,7 @@ class Band:
             range = '%.3f kHz-%.3f kHz' % (self.f_start / 1e3, self.f_end / 1e3)
         else:
             range = '%.3f Hz-%.3f Hz' % (self.f_start, self.f_end)
-        return 'Band %s %s' % (self.name, range)
+        return '%s %s %s' % (self.__class__.__name__, self.name, range)
     # end def __str__
     __repr__ = __str__
 
@@ -58,6 +66,37 @@ class Band:
 
 # end class Band
 
+class Segment (Band):
+    """ Part of a band with a mode (e.g. CW, DIGI, ALL, or a comma
+        separated list like CW,DIGI), the maximum bandwidth in Hz and
+        the license classes allowed to use it (None if not
+        restricted). Unlike bands, segments are half-open intervals, a
+        frequency at the end of a segment belongs to the next segment.
+        Segments may be nested, the innermost segment is the most
+        specific.
+    """
+
+    def __init__ \
+        (self, band, mode, f_start, f_end, bandwidth = None, licenses = None):
+        self.__super.__init__ (band.plan, mode, f_start, f_end)
+        self.band      = band
+        self.mode      = mode
+        self.bandwidth = bandwidth
+        self.licenses  = licenses
+    # end def __init__
+
+    def __str__ (self):
+        s = self.__super.__str__ ()
+        if self.bandwidth:
+            s += ' bw=%g' % self.bandwidth
+        if self.licenses:
+            s += ' license=%s' % ','.join (self.licenses)
+        return s
+    # end def __str__
+    __repr__ = __str__
+
+# end class Segment
+
 class Overlap_Error (ValueError):
     """ This is raised if an inserted band overlaps an existing one
     """
@@ -68,55 +107,413 @@ class Bandplan:
         These typically constitute a national band plan.
     """
 
-    def __init__ (self):
+    def __init__ (self, name = None, title = None, region = None):
         """ This is kept sorted for a little faster lookup
         """
-        self.bands = []
+        self.name    = name
+        self.title   = title
+        self.region  = region
+        self.dxcc    = set ()
+        self.bands   = []
+        self.starts  = []
+        self._arrays = None
+        self.segments       = []
+        self._segment_index = None
     # end def __init__
 
     def add_band (self, band):
-        idx = bisect_right (self.bands, band)
-        l   = len (self.bands)
-        if idx > 0 and idx < l and self.bands [idx].end > band.start:
-            raise Overlap_Error \
-                ('New band %s overlaps existing %s' % (band, self.bands [idx]))
+        idx = bisect_right (self.starts, band.f_start)
+        for other in self.bands [max (idx - 1, 0):idx + 1]:
+            if other.f_start < band.f_end and band.f_start < other.f_end:
+                raise Overlap_Error \
+                    ('New band %s overlaps existing %s' % (band, other))
         self.bands.insert (idx, band)
+        self.starts.insert (idx, band.f_start)
+        self._arrays = None
     # end def add_band
 
     def lookup (self, frq):
-        b   = Band (None, 'dummy', frq, frq)
-        idx = bisect_right (self.bands, b) - 1
+        idx = bisect_right (self.starts, frq) - 1
         if idx < 0:
             return
         entry = self.bands [idx]
-        if idx and entry.f_start <= frq <= entry.f_end:
+        if entry.f_start <= frq <= entry.f_end:
             return entry
-    # end def
+    # end def lookup
+
+    def add_segment (self, segment):
+        """ Add a segment, it must be inside its band
+        """
+        band = segment.band
+        if  (  band.plan is not self
+            or segment.f_start < band.f_start
+            or segment.f_end   > band.f_end
+            ):
+            raise ValueError ('%s is not inside %s' % (segment, band))
+        band.segments.append (segment)
+        self.segments.append (segment)
+        self._segment_index = None
+    # end def add_segment
+
+    @property
+    def segment_index (self):
+        """ Index for stabbing queries on segments: The segment
+            boundaries split the frequency range into elementary
+            intervals, for each we store the segments covering it,
+            outermost first. The numpy arrays (if available) contain
+            the boundaries and the innermost segment of each interval.
+        """
+        if self._segment_index is None:
+            bounds = sorted \
+                (set (s.f_start for s in self.segments)
+                |set (s.f_end   for s in self.segments)
+                )
+            segs     = self.segments
+            by_width = sorted \
+                ( range (len (segs))
+                , key = lambda i: segs [i].f_start - segs [i].f_end
+                )
+            cover = []
+            for f in bounds:
+                cover.append (tuple \
+                    ( i for i in by_width
+                      if segs [i].f_start <= f < segs [i].f_end
+                    ))
+            arrays = None
+            if np is not None:
+                inner  = [c [-1] if c else -1 for c in cover]
+                arrays = \
+                    ( np.array (bounds, dtype = float)
+                    , np.array (inner + [-1], dtype = np.int32)
+                    )
+            self._segment_index = (bounds, cover, arrays)
+        return self._segment_index
+    # end def segment_index
+
+    def lookup_segments (self, frq):
+        """ All segments containing frq, outermost first
+        >>> bpa = bandplans.plans ['iaru-r1']
+        >>> for s in bpa.lookup_segments (3.61e6):
+        ...     print (s)
+        Segment ALL 3.600 MHz-3.800 MHz bw=2700
+        Segment DIGI 3.600 MHz-3.620 MHz bw=2700
+        >>> bpa.lookup_segments (14.074e6)
+        [Segment DIGI 14.070 MHz-14.099 MHz bw=500]
+        >>> bpa.lookup_segments (14.099e6)
+        [Segment BEACON 14.099 MHz-14.101 MHz]
+        """
+        bounds, cover, arrays = self.segment_index
+        idx = bisect_right (bounds, frq) - 1
+        if idx < 0:
+            return []
+        return [self.segments [i] for i in cover [idx]]
+    # end def lookup_segments
+
+    def batch_segments (self, frequencies):
+        """ Index into self.segments of the innermost segment for each
+            frequency of an array, -1 if not in a segment
+        """
+        if np is None:
+            raise ImportError ("Batch lookup needs numpy")
+        bounds, cover, (starts, inner) = self.segment_index
+        frq = np.asarray (frequencies, dtype = float)
+        idx = np.searchsorted (starts, frq, side = 'right') - 1
+        return inner [idx]
+    # end def batch_segments
+
+    def batch_classify (self, frequencies, attribute = 'mode'):
+        """ Return the given attribute of the innermost segment for an
+            array of frequencies, empty for frequencies outside all
+            segments.
+        >>> bpa = bandplans.plans ['iaru-r1']
+        >>> bpa.batch_classify ([14.074e6, 14.2e6, 14.03e6, 13e6])
+        array(['DIGI', 'ALL', 'CW', ''], dtype='<U6')
+        """
+        values = [getattr (s, attribute) for s in self.segments] + [None]
+        values = np.array (['' if v is None else str (v) for v in values])
+        return values [self.batch_segments (frequencies)]
+    # end def batch_classify
+
+    def allowed (self, frq, license):
+        """ Check if license class may use frq: The innermost segment
+            with a license restriction decides, without a restriction
+            the frequency must be inside a band.
+        >>> usa = bandplans.plans ['usa']
+        >>> usa.allowed (14.02e6, 'E'), usa.allowed (14.02e6, 'G')
+        (True, False)
+        >>> usa.allowed (7.03e6, 'T'), usa.allowed (7.2e6, 'T')
+        (True, False)
+        >>> usa.allowed (50.1e6, 'T'), usa.allowed (49e6, 'E')
+        (True, False)
+        """
+        for s in reversed (self.lookup_segments (frq)):
+            if s.licenses:
+                return license in s.licenses
+        return self.lookup (frq) is not None
+    # end def allowed
+
+    def batch_allowed (self, frequencies, license):
+        """ Vectorised version of allowed for an array of frequencies
+        """
+        bounds, cover, (starts, inner) = self.segment_index
+        ok = []
+        for c in cover:
+            for i in reversed (c):
+                if self.segments [i].licenses:
+                    ok.append (license in self.segments [i].licenses)
+                    break
+            else:
+                ok.append (None)
+        ok.append (None)
+        frq = np.asarray (frequencies, dtype = float)
+        idx = np.searchsorted (starts, frq, side = 'right') - 1
+        dec = np.array ([x is not None for x in ok]) [idx]
+        res = np.array ([bool (x) for x in ok]) [idx]
+        return np.where (dec, res, self.batch_lookup (frq) >= 0)
+    # end def batch_allowed
+
+    @property
+    def arrays (self):
+        """ Sorted numpy arrays of band start and end frequencies and of
+            band names, built on first use after a change
+        """
+        if np is None:
+            raise ImportError ("Batch lookup needs numpy")
+        if self._arrays is None:
+            self._arrays = \
+                ( np.array (self.starts, dtype = float)
+                , np.array ([b.f_end for b in self.bands], dtype = float)
+                , np.array ([b.name  for b in self.bands] + [''], dtype = str)
+                )
+        return self._arrays
+    # end def arrays
+
+    def batch_lookup (self, frequencies, names = False):
+        """ Look up an array of frequencies (in Hz), return an array of
+            indeces into self.bands, -1 for frequencies outside of all
+            bands. With names = True an array of band names is returned
+            instead, frequencies outside of all bands get an empty name.
+        >>> bpa = bandplan_austria
+        >>> bpa.batch_lookup ([135.7e3, 7.074e6, 7.3e6, 14.074e6])
+        array([ 0,  5, -1,  7])
+        >>> bpa.batch_lookup ([135.7e3, 7.074e6, 7.3e6, 1e3], names = True)
+        array(['2.2km', '40m', '', ''], dtype='<U5')
+        """
+        starts, ends, bandnames = self.arrays
+        frq = np.asarray (frequencies, dtype = float)
+        idx = np.searchsorted (starts, frq, side = 'right') - 1
+        ok  = idx >= 0
+        ok [ok] = frq [ok] <= ends [idx [ok]]
+        idx = np.where (ok, idx, -1)
+        if names:
+            return bandnames [idx]
+        return idx
+    # end def batch_lookup
 
 # end class Bandplan
 
-# Sources:
-# https://www.oevsv.at/funkbetrieb/amateurfunkfrequenzen/hf-referat/
-# https://www.oevsv.at/export/shared/.content/.galleries/Downloads_Referate/UKW-Referat-Downloads/UKW-Bandplan.pdf
-# https://www.oevsv.at/oevsv/aktuelles/60m-Band-und-630m-Band-nun-in-Oesterreich-fuer-den-Amateurfunk-freigegeben/
-bandplan_austria = bpa = Bandplan ()
-bpa.add_band (Band (bpa, '2.2km',   135.7e3,   137.8e3))
-bpa.add_band (Band (bpa, '630m',    472.0e3,   479.0e3))
-bpa.add_band (Band (bpa, '160m',   1810.0e3,  2000.0e3))
-bpa.add_band (Band (bpa, '80m',    3500.0e3,  3800.0e3))
-bpa.add_band (Band (bpa, '60m',    5351.3e3,  5366.5e3))
-bpa.add_band (Band (bpa, '40m',    7000.0e3,  7200.0e3))
-bpa.add_band (Band (bpa, '30m',   10100.0e3, 10150.0e3))
-bpa.add_band (Band (bpa, '20m',   14000.0e3, 14350.0e3))
-bpa.add_band (Band (bpa, '17m',   18068.0e3, 18168.0e3))
-bpa.add_band (Band (bpa, '15m',   21000.0e3, 21450.0e3))
-bpa.add_band (Band (bpa, '12m',   24890.0e3, 24990.0e3))
-bpa.add_band (Band (bpa, '10m',   28000.0e3, 29700.0e3))
-bpa.add_band (Band (bpa, '6m',       50.0e6,    52.0e6))
-bpa.add_band (Band (bpa, '2m',      144.0e6,   146.0e6))
-bpa.add_band (Band (bpa, '70cm',    430.0e6,   440.0e6))
-
-__all__ = ['bandplan_austria', 'Band', 'Bandplan', 'Overlap_Error']
+class Bandplan_Registry:
+    """ Band plans read from data files, selectable by DXCC entity.
+        A file contains one or more plans, each starting with a "plan"
+        line giving the name of the plan. The following lines are
+        "title", "region" (IARU region), "continent" (list of continent
+        abbreviations), "dxcc" (list of DXCC entity codes), "band"
+        (band name, start and end frequency in kHz) and "segment"
+        (start and end frequency in kHz, mode and optionally bw=<maximum
+        bandwidth in Hz> and license=<comma separated license classes>).
+        Empty lines and lines starting with '#' are ignored.
+        A plan with a continent line is a regional plan: It is used for
+        entities on these continents and for the entities listed in its
+        dxcc lines (e.g. the Asian entities in IARU Region 1). Other
+        plans are national plans for their dxcc entities, these take
+        precedence over the regional plans.
+    """
+
+    data = os.path.join (os.path.dirname (__file__), 'data')
+    keywords = \
+        ('plan', 'title', 'region', 'continent', 'dxcc', 'band', 'segment')
+
+    def __init__ (self, *filenames):
+        self.plans        = {}
+        self.national     = {}
+        self.regional     = {}
+        self.by_continent = {}
+        for fn in filenames:
+            self.load (fn)
+    # end def __init__
+
+    def load (self, filename):
+        plan = None
+        with open (filename, 'r') as f:
+            for n, line in enumerate (f):
+                line = line.split ('#', 1)[0].split ()
+                if not line:
+                    continue
+                kw, args = line [0], line [1:]
+                where = '%s:%d' % (filename, n + 1)
+                if kw not in self.keywords or not args:
+                    raise ValueError ('%s: Invalid line' % where)
+                if kw == 'plan':
+                    self._add (plan)
+                    plan = Bandplan (args [0])
+                    plan.continent = []
+                    continue
+                if plan is None:
+                    raise ValueError ('%s: Expected "plan"' % where)
+                if kw == 'title':
+                    plan.title = ' '.join (args)
+                elif kw == 'region':
+                    plan.region = int (args [0])
+                elif kw == 'continent':
+                    plan.continent.extend (args)
+                elif kw == 'dxcc':
+                    plan.dxcc.update (int (a) for a in args)
+                elif kw == 'segment':
+                    plan.add_segment (self.segment (plan, args, where))
+                else:
+                    if len (args) != 3:
+                        raise ValueError ('%s: Invalid band' % where)
+                    start, end = (float (a) * 1e3 for a in args [1:])
+                    plan.add_band (Band (plan, args [0], start, end))
+        self._add (plan)
+    # end def load
+
+    def segment (self, plan, args, where):
+        """ Create Segment from arguments of a segment line
+        """
+        if len (args) < 3:
+            raise ValueError ('%s: Invalid segment' % where)
+        start, end = (float (a) * 1e3 for a in args [:2])
+        band = plan.lookup (start)
+        if band is None:
+            raise ValueError ('%s: Segment not in a band' % where)
+        kw = {}
+        for a in args [3:]:
+            k, sep, v = a.partition ('=')
+            if k == 'bw' and sep:
+                kw ['bandwidth'] = float (v)
+            elif k == 'license' and sep:
+                kw ['licenses'] = tuple (v.split (','))
+            else:
+                raise ValueError ('%s: Invalid segment option %s' % (where, a))
+        return Segment (band, args [2], start, end, **kw)
+    # end def segment
+
+    def _add (self, plan):
+        if plan is None:
+            return
+        if plan.name in self.plans:
+            raise ValueError ('Duplicate band plan "%s"' % plan.name)
+        self.plans [plan.name] = plan
+        by_dxcc = self.regional if plan.continent else self.national
+        for code in plan.dxcc:
+            if code in by_dxcc:
+                raise ValueError \
+                    ( 'DXCC entity %s in plans "%s" and "%s"'
+                    % (code, by_dxcc [code].name, plan.name)
+                    )
+            by_dxcc [code] = plan
+        for c in plan.continent:
+            if c in self.by_continent:
+                raise ValueError \
+                    ( 'Continent %s in plans "%s" and "%s"'
+                    % (c, self.by_continent [c].name, plan.name)
+                    )
+            self.by_continent [c] = plan
+        # Compile lookup indexes now, not on first lookup
+        plan.segment_index
+        if np is not None:
+            plan.arrays
+    # end def _add
+
+    def plan (self, dxcc = None, continent = None):
+        """ Band plan for a DXCC entity given by its code or as an
+            entry of the DXCC list (which contains the continent).
+            Without a national or regional plan for the entity the plan
+            of the continent is returned (or None).
+        >>> bp = bandplans
+        >>> bp.plan (206).name, bp.plan (15, 'AS').name
+        ('austria', 'iaru-r1')
+        >>> bp.plan (None, 'AS').name
+        'iaru-r3'
+        >>> bp.plan (110, 'OC').name, bp.plan (230, 'EU').name
+        ('usa', 'iaru-r1')
+        """
+        if hasattr (dxcc, 'code'):
+            if continent is None:
+                continent = dxcc.continent
+            dxcc = dxcc.code
+        if dxcc is not None:
+            dxcc = int (dxcc)
+        if dxcc in self.national:
+            return self.national [dxcc]
+        if dxcc in self.regional:
+            return self.regional [dxcc]
+        if continent:
+            return self.by_continent.get (continent.split (',')[0])
+    # end def plan
+
+    def batch_lookup (self, dxcc, continents, frequencies, names = True):
+        """ Look up bands for arrays of DXCC codes (e.g. of the
+            spotters), continents and frequencies, each row is looked
+            up in the plan for its entity. Rows are grouped by plan, so
+            each plan does a single batch lookup. Returns band names
+            (empty if not found) or with names = False the band index in
+            the plan of the row (-1 if not found).
+        >>> bp = bandplans
+        >>> bp.batch_lookup \\
+        ...     ( [206, 291, 230, 1, -1], ['EU', 'NA', 'EU', 'NA', 'OC']
+        ...     , [5.36e6, 3.9e6, 3.9e6, 3.9e6, 3.85e6]
+        ...     )
+        array(['60m', '80m', '', '80m', '80m'], dtype='<U3')
+        >>> bp.batch_lookup ([291, 223, 339], ['NA', 'EU', 'AS'], [137e3] * 3)
+        array(['2.2km', '2.2km', '2.2km'], dtype='<U5')
+        >>> bp.batch_lookup ([], [], [])
+        array([], dtype='<U1')
+        """
+        if np is None:
+            raise ImportError ("Batch lookup needs numpy")
+        dxcc = np.asarray (dxcc, dtype = str)
+        cont = np.asarray (continents, dtype = str)
+        frq  = np.asarray (frequencies, dtype = float)
+        if not len (frq):
+            if names:
+                return np.array ([], dtype = str)
+            return np.array ([], dtype = np.int32)
+        keys = np.char.add (dxcc, np.char.add ('/', cont))
+        uniq, inverse = np.unique (keys, return_inverse = True)
+        plans = list (self.plans.values ())
+        pidx  = dict ((p.name, n) for n, p in enumerate (plans))
+        by_key = []
+        for k in uniq:
+            code, c = k.split ('/')
+            p = self.plan (int (code), c)
+            by_key.append (-1 if p is None else pidx [p.name])
+        rowplan = np.array (by_key, dtype = np.int32) [inverse.reshape (-1)]
+        if names:
+            result = np.full (len (frq), '', dtype = object)
+        else:
+            result = np.full (len (frq), -1, dtype = np.int32)
+        for n in np.unique (rowplan):
+            if n < 0:
+                continue
+            rows = np.flatnonzero (rowplan == n)
+            result [rows] = plans [n].batch_lookup (frq [rows], names = names)
+        if names:
+            result = result.astype (str)
+        return result
+    # end def batch_lookup
+
+# end class Bandplan_Registry
+
+bandplans = Bandplan_Registry \
+    (*sorted (glob (os.path.join (Bandplan_Registry.data, 'bandplan-*.txt'))))
+bandplan_austria = bpa = bandplans.plans ['austria']
+
+__all__ = \
+    [ 'bandplan_austria', 'bandplans', 'Band', 'Bandplan'
+    , 'Bandplan_Registry', 'Overlap_Error', 'Segment'
+    ]
 
 if __name__ == '__main__':
     #for b in bandplan_austria.bands:
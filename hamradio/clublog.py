@@ -0,0 +1,182 @@
+#!/usr/bin/python3
+# Copyright (C) 2026 Dr. Ralf Schlatterbeck Open Source Consulting.
+# Reichergasse 131, A-3411 Weidling.
+# Web: http://www.runtux.com Email: office@runtux.com
+# ****************************************************************************
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS
+# IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED
+# TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A
+# PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED
+# TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ****************************************************************************
+
+import io
+import sys
+from gzip              import GzipFile
+from argparse          import ArgumentParser
+from xml.etree         import ElementTree
+from hamradio.interval import Dated_Index, as_datetime
+
+class Clublog_Record:
+    """ A dated record from a Club Log cty.xml file.
+        Depending on the list it comes from it has the attributes
+        call, entity, adif, cqz, cont, lat, lon, zone, start and end,
+        missing ones are None.
+    """
+
+    fields = \
+        ( 'call', 'entity', 'adif', 'cqz', 'cont', 'lat', 'long', 'zone'
+        , 'start', 'end'
+        )
+    conversion = dict \
+        ( adif  = int
+        , cqz   = int
+        , zone  = int
+        , lat   = float
+        , long  = float
+        , start = as_datetime
+        , end   = as_datetime
+        )
+
+    def __init__ (self, element, ns = ''):
+        self.record = element.get ('record')
+        for f in self.fields:
+            v = element.findtext (ns + f)
+            if v is not None:
+                v = v.strip ()
+            if v and f in self.conversion:
+                v = self.conversion [f] (v)
+            setattr (self, f, v or None)
+        self.lon = self.long
+    # end def __init__
+
+    def __str__ (self):
+        r = [self.call]
+        if self.entity:
+            r.append ('%s (%s)' % (self.entity, self.adif))
+        if self.zone:
+            r.append ('CQ: %s' % self.zone)
+        r.append \
+            ( '%s-%s'
+            % ( self.start.strftime ('%Y-%m-%d') if self.start else ''
+              , self.end.strftime   ('%Y-%m-%d') if self.end   else ''
+              )
+            )
+        return ' '.join (r)
+    # end def __str__
+    __repr__ = __str__
+
+# end class Clublog_Record
+
+class Clublog_Exceptions:
+    """ Dated callsign exceptions, invalid operations and CQ zone
+        exceptions from a local copy of the Club Log cty.xml file
+        (optionally gzip compressed). Each list is kept as an interval
+        index per callsign, so a lookup for a callsign at a given date
+        is a dictionary lookup followed by a bisection.
+        Docs: https://clublog.freshdesk.com/support/solutions/articles/54902
+    """
+
+    def __init__ (self, filename):
+        self.filename   = filename
+        self.exceptions = Dated_Index ()
+        self.invalid    = Dated_Index ()
+        self.zones      = Dated_Index ()
+        self.entities   = {}
+        with io.open (filename, 'rb') as f:
+            if f.read (2) == b'\x1f\x8b':
+                f.seek (0)
+                f = GzipFile (fileobj = f)
+            else:
+                f.seek (0)
+            root = ElementTree.parse (f).getroot ()
+        ns = ''
+        if root.tag.startswith ('{'):
+            ns = root.tag [:root.tag.index ('}') + 1]
+        self.date = root.get ('date')
+        for e in root.iterfind ('%sentities/%sentity' % (ns, ns)):
+            self.entities [int (e.findtext (ns + 'adif'))] = \
+                e.findtext (ns + 'name')
+        lists = \
+            ( ('exceptions',         'exception',      self.exceptions)
+            , ('invalid_operations', 'invalid',        self.invalid)
+            , ('zone_exceptions',    'zone_exception', self.zones)
+            )
+        for section, tag, index in lists:
+            for e in root.iterfind ('%s%s/%s%s' % (ns, section, ns, tag)):
+                r = Clublog_Record (e, ns)
+                index.add (r.call, r.start, r.end, r)
+    # end def __init__
+
+    def exception (self, call, date):
+        """ Return the exception record for call valid at date or None
+        """
+        return self.exceptions.lookup (call, as_datetime (date))
+    # end def exception
+
+    def is_invalid (self, call, date):
+        """ True if the operation of call at date is not valid
+        """
+        return self.invalid.lookup (call, as_datetime (date)) is not None
+    # end def is_invalid
+
+    def zone (self, call, date):
+        """ CQ zone exception for call at date or None
+        """
+        r = self.zones.lookup (call, as_datetime (date))
+        if r is not None:
+            return r.zone
+    # end def zone
+
+# end class Clublog_Exceptions
+
+def main ():
+    cmd = ArgumentParser ()
+    cmd.add_argument \
+        ( "clublog"
+        , help    = "Club Log cty.xml file (may be gzip compressed)"
+        )
+    cmd.add_argument \
+        ( "date"
+        , help    = "Date of QSO, ISO or ADIF format"
+        )
+    cmd.add_argument \
+        ( "callsign"
+        , help    = "Callsign to look up"
+        , nargs   = '*'
+        )
+    args = cmd.parse_args ()
+    cl   = Clublog_Exceptions (args.clublog)
+    for call in args.callsign:
+        if cl.is_invalid (call, args.date):
+            print ("%s: INVALID OPERATION" % call)
+            continue
+        r = cl.exception (call, args.date)
+        z = cl.zone (call, args.date)
+        if r is None and z is None:
+            print ("%s: no exception" % call)
+        if r is not None:
+            print ("%s: %s" % (call, r))
+        if z is not None:
+            print ("%s: CQ zone %s" % (call, z))
+# end def main
+
+if __name__ == '__main__':
+    main ()
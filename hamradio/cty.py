@@ -30,7 +30,21 @@
 import io
 import sys
 import os
-from hamradio.dxcc import DXCC_File
+import json
+import math
+import mmap
+import threading
+from itertools          import islice
+from re                 import compile as rc
+from concurrent.futures import ProcessPoolExecutor
+from hamradio.dxcc      import DXCC_File, DXCC_History
+from hamradio.clublog   import Clublog_Exceptions
+from hamradio.qth       import locator_position, batch_great_circle
+from hamradio.qth       import earth_radius
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 # Sources
 # Big CTY list:
@@ -146,22 +160,74 @@ darc_waedc_dxcc = dict \
     ,  ('Vienna Intl Ctr',          'Austria')  # *4U1V
     ))
 
-class CTY:
-    """ Parse Country information in cty.dat format
-        Docs: https://www.country-files.com/cty-dat-format/
+class CTY_Entity:
+    """ A country (entity) from cty.dat with its zones and position.
+        Note that cty.dat uses positive longitudes for west, we convert
+        to the usual convention (east is positive).
+        Prefixes and callsigns in cty.dat can override the zones, the
+        continent, the position or the time offset of their entity,
+        these are represented by a copy of the entity made with
+        override, base of the copy refers to the original entity.
     """
 
-    data = os.path.join (os.path.dirname (__file__), 'data', 'cty.dat')
+    def __init__ \
+        (self, name, cq, itu, continent, lat, lon, gmtoff, prefix, index):
+        self.name      = name
+        self.cq        = int (cq)
+        self.itu       = int (itu)
+        self.continent = continent
+        self.lat       = float (lat)
+        self.lon       = -float (lon)
+        self.gmtoff    = float (gmtoff)
+        self.prefix    = prefix
+        self.index     = index
+        self.base      = self
+    # end def __init__
+
+    def override (self, **kw):
+        e = self.__class__.__new__ (self.__class__)
+        e.__dict__.update (self.__dict__)
+        e.__dict__.update (kw)
+        return e
+    # end def override
+
+    def __str__ (self):
+        return '%s (%s) CQ: %s ITU: %s %s %.2f/%.2f' \
+            % ( self.name, self.prefix, self.cq, self.itu
+              , self.continent, self.lat, self.lon
+              )
+    # end def __str__
+    __repr__ = __str__
+
+# end class CTY_Entity
+
+class CTY_Table:
+    """ Compiled lookup tables of a single cty.dat file.
+        A table is never modified once it is built: A CTY object that
+        wants to pick up a new cty.dat builds a new table and replaces
+        the old one as a whole.
+    """
 
     # After prefix, additional info can be appended enclosed in the
-    # following suffix markup. We ignore those currently.
-    suffixes = '()', '[]', '<>', '{}', '~~'
+    # following suffix markup: CQ zone, ITU zone, lat/lon, continent
+    # and time offset.
+    suffixes    = '()', '[]', '<>', '{}', '~~'
+    re_override = rc \
+        (r'\(([0-9]+)\)|\[([0-9]+)\]|<([-0-9.]+)/([-0-9.]+)>'
+         r'|\{([A-Z]+)\}|~([-0-9.]+)~'
+        )
 
     def __init__ (self, filename):
+        self.filename       = filename
         self.exact_callsign = {}
         self.prefix         = {}
         self.prf_max        = 0
         self.countries      = {}
+        self.entities       = []
+        self.exact_override = {}
+        self.prefix_override = {}
+        self.mtime          = os.stat (filename).st_mtime
+        self._compiled      = None
         country = None
         with io.open (filename, 'r') as f:
             for line in f:
@@ -171,7 +237,12 @@ class CTY:
                     line = line.rstrip (':')
                     l = [x.lstrip () for x in line.split (':')]
                     country, cq, itu, ctycode, lat, lon, gmtoff, pfx = l
-                    self.countries [country] = True
+                    entity = CTY_Entity \
+                        ( country, cq, itu, ctycode, lat, lon, gmtoff, pfx
+                        , len (self.entities)
+                        )
+                    self.entities.append (entity)
+                    self.countries [country] = entity
                     end = False
                 else:
                     # Docs say 'should' contain comma at the end on continuation
@@ -181,25 +252,78 @@ class CTY:
                     line = line.rstrip (',')
                     pfxs = line.split (',')
                     for pfx in pfxs:
-                        # discard any additional info at end of prefix
+                        # split off additional info at end of prefix
+                        info = ''
                         for s in self.suffixes:
                             s = s [0]
-                            pfx = pfx.split (s, 1) [0]
+                            if s in pfx:
+                                pfx, i = pfx.split (s, 1)
+                                info = s + i + info
+                        override = None
+                        if info:
+                            override = self.override (entity, info)
                         if pfx.startswith ('='):
                             pfx = pfx.lstrip ('=')
                             if pfx not in self.exact_callsign:
                                 self.exact_callsign [pfx] = country
+                                if override:
+                                    self.exact_override [pfx] = override
                         else:
                             l = len (pfx)
                             if l > self.prf_max:
                                 self.prf_max = l
                             if pfx not in self.prefix:
                                 self.prefix [pfx] = country
+                                if override:
+                                    self.prefix_override [pfx] = override
                     if end:
                         country = None
                         end     = False
     # end def __init__
 
+    def override (self, entity, info):
+        """ Create an entity with overrides from the info suffix
+        """
+        kw = {}
+        for m in self.re_override.finditer (info):
+            cq, itu, lat, lon, continent, gmtoff = m.groups ()
+            if cq:
+                kw ['cq']  = int (cq)
+            if itu:
+                kw ['itu'] = int (itu)
+            if lat:
+                kw ['lat'] = float (lat)
+                kw ['lon'] = -float (lon)
+            if continent:
+                kw ['continent'] = continent
+            if gmtoff:
+                kw ['gmtoff'] = float (gmtoff)
+        return entity.override (**kw)
+    # end def override
+
+    @property
+    def compiled (self):
+        """ Tables for batch lookup, computed on first use
+        """
+        if self._compiled is None:
+            self._compiled = CTY_Compiled (self)
+        return self._compiled
+    # end def compiled
+
+    def callsign_info (self, callsign):
+        """ Like callsign_lookup but return the CTY_Entity including
+            overrides for the callsign or prefix
+        """
+        if callsign in self.exact_callsign:
+            e = self.exact_override.get (callsign)
+            return e or self.countries [self.exact_callsign [callsign]]
+        for n in reversed (range (self.prf_max)):
+            pfx = callsign [:n+1]
+            if pfx in self.prefix:
+                e = self.prefix_override.get (pfx)
+                return e or self.countries [self.prefix [pfx]]
+    # end def callsign_info
+
     def callsign_lookup (self, callsign):
         if callsign in self.exact_callsign:
             return self.exact_callsign [callsign]
@@ -209,6 +333,654 @@ class CTY:
                 return self.prefix [pfx]
     # end def callsign_lookup
 
+    def diff (self, other):
+        """ Differences from this table to the newer table other
+        """
+        return CTY_Diff (self, other)
+    # end def diff
+
+# end class CTY_Table
+
+class CTY_Compiled:
+    """ Lookup arrays for batch lookup of many callsigns with numpy.
+        Each distinct CTY_Entity (including the overrides of prefixes
+        and exact callsigns) becomes a record, the per-record arrays
+        entity, cq and itu have an additional last element for "not
+        found", so looking up a record index of -1 yields entity -1
+        and zones 0.
+        Exact callsigns and the prefixes of each length are kept in
+        sorted arrays with the record index in a parallel array, these
+        are searched with searchsorted.
+    """
+
+    def __init__ (self, table):
+        if np is None:
+            raise ImportError ("Batch lookup needs numpy")
+        self._records = list (table.entities)
+        ovr = list (table.exact_override.values ())
+        ovr.extend (table.prefix_override.values ())
+        idx = dict ((id (e), e.index) for e in self._records)
+        for e in ovr:
+            if id (e) not in idx:
+                idx [id (e)] = len (self._records)
+                self._records.append (e)
+        self.entity = np.array \
+            ([r.base.index for r in self.records] + [-1], dtype = np.int32)
+        self.cq  = np.array ([r.cq  for r in self.records] + [0], np.int16)
+        self.itu = np.array ([r.itu for r in self.records] + [0], np.int16)
+        self.lat = np.array ([r.lat for r in self.records] + [np.nan])
+        self.lon = np.array ([r.lon for r in self.records] + [np.nan])
+        self._headings = {}
+        def record (key, name, override):
+            if key in override:
+                return idx [id (override [key])]
+            return table.countries [name].index
+        keys = sorted (table.exact_callsign)
+        self.exact_keys = np.array (keys, dtype = str)
+        self.exact_vals = np.array \
+            ( [ record (k, table.exact_callsign [k], table.exact_override)
+                for k in keys
+              ]
+            , dtype = np.int32
+            )
+        by_len = {}
+        for k in table.prefix:
+            if k:
+                by_len.setdefault (len (k), []).append (k)
+        self.prefix_keys = {}
+        self.prefix_vals = {}
+        for l in sorted (by_len):
+            keys = sorted (by_len [l])
+            self.prefix_keys [l] = np.array (keys, dtype = 'U%d' % l)
+            self.prefix_vals [l] = np.array \
+                ( [ record (k, table.prefix [k], table.prefix_override)
+                    for k in keys
+                  ]
+                , dtype = np.int32
+                )
+    # end def __init__
+
+    @staticmethod
+    def _match (keys, vals, queries):
+        if not len (keys):
+            return np.full (len (queries), -1, dtype = np.int32)
+        pos = np.searchsorted (keys, queries)
+        pos = np.minimum (pos, len (keys) - 1)
+        return np.where (keys [pos] == queries, vals [pos], -1)
+    # end def _match
+
+    # Flat format: magic, length of the JSON header (8 bytes little
+    # endian), the header with name, dtype, length and offset of each
+    # array, then the aligned arrays. The records are stored as JSON
+    # in a byte array, they are decoded only when needed.
+    magic = b'CTYC0002'
+    align = 16
+
+    @classmethod
+    def _aligned (cls, offset):
+        return (offset + cls.align - 1) // cls.align * cls.align
+    # end def _aligned
+
+    def arrays (self):
+        """ All lookup arrays with their names
+        """
+        a = \
+            [ ('entity',     self.entity)
+            , ('cq',         self.cq)
+            , ('itu',        self.itu)
+            , ('lat',        self.lat)
+            , ('lon',        self.lon)
+            , ('exact_keys', self.exact_keys)
+            , ('exact_vals', self.exact_vals)
+            ]
+        for l in self.prefix_keys:
+            a.append (('prefix_keys/%d' % l, self.prefix_keys [l]))
+            a.append (('prefix_vals/%d' % l, self.prefix_vals [l]))
+        return a
+    # end def arrays
+
+    @property
+    def records (self):
+        if self._records is None:
+            self._records = []
+            for d in json.loads (self.record_data.tobytes ().decode ('utf-8')):
+                e = CTY_Entity.__new__ (CTY_Entity)
+                e.__dict__.update (d)
+                self._records.append (e)
+            for e in self._records:
+                e.base = self._records [e.base]
+        return self._records
+    # end def records
+
+    def to_bytes (self):
+        """ Serialize to the flat read-only format
+        """
+        records = []
+        for r in self.records:
+            d = dict (r.__dict__)
+            d ['base'] = r.base.index
+            records.append (d)
+        records = json.dumps (records).encode ('utf-8')
+        arrays  = self.arrays ()
+        arrays.append (('record_data', np.frombuffer (records, np.uint8)))
+        layout  = []
+        offset  = 0
+        for name, a in arrays:
+            layout.append ((name, a.dtype.str, len (a), offset))
+            offset = self._aligned (offset + a.nbytes)
+        header = json.dumps (layout).encode ('utf-8')
+        start  = self._aligned (16 + len (header))
+        buf    = bytearray (start + offset)
+        buf [:8]   = self.magic
+        buf [8:16] = len (header).to_bytes (8, 'little')
+        buf [16:16 + len (header)] = header
+        for (name, a), (n, dt, l, offset) in zip (arrays, layout):
+            buf [start + offset:start + offset + a.nbytes] = a.tobytes ()
+        return bytes (buf)
+    # end def to_bytes
+
+    @classmethod
+    def from_buffer (cls, buf):
+        """ Create lookup tables from a buffer in the flat format, the
+            arrays are read-only views of the buffer, nothing is copied.
+        """
+        if np is None:
+            raise ImportError ("Batch lookup needs numpy")
+        buf = memoryview (buf)
+        if bytes (buf [:8]) != cls.magic:
+            raise ValueError ("Not a compiled cty table")
+        hlen   = int.from_bytes (buf [8:16], 'little')
+        header = json.loads (bytes (buf [16:16 + hlen]).decode ('utf-8'))
+        start  = cls._aligned (16 + hlen)
+        self   = cls.__new__ (cls)
+        self.buffer   = buf
+        self._records = None
+        self._headings = {}
+        self.prefix_keys = {}
+        self.prefix_vals = {}
+        for name, dtype, l, offset in header:
+            a = np.frombuffer \
+                (buf, dtype = dtype, count = l, offset = start + offset)
+            if '/' in name:
+                name, l = name.split ('/')
+                getattr (self, name) [int (l)] = a
+            else:
+                setattr (self, name, a)
+        return self
+    # end def from_buffer
+
+    def save (self, filename):
+        """ Write the flat format to a file, atomically replacing an
+            existing file so that readers never see a partial file.
+        """
+        tmp = filename + '.tmp'
+        with open (tmp, 'wb') as f:
+            f.write (self.to_bytes ())
+        os.replace (tmp, filename)
+    # end def save
+
+    @classmethod
+    def load (cls, filename):
+        """ Map a file written by save into memory
+        """
+        with open (filename, 'rb') as f:
+            m = mmap.mmap (f.fileno (), 0, access = mmap.ACCESS_READ)
+        return cls.from_buffer (m)
+    # end def load
+
+    def headings (self, home):
+        """ Bearing/distance table from home (a locator or a (lat, lon)
+            tuple) to every record, computed once per home position.
+        """
+        if isinstance (home, str):
+            pos = locator_position (home)
+            if pos is None:
+                raise ValueError ("Invalid locator: %s" % home)
+            home = pos
+        home = tuple (home)
+        if home not in self._headings:
+            self._headings [home] = CTY_Headings (self, *home)
+        return self._headings [home]
+    # end def headings
+
+    def lookup (self, calls):
+        """ Return record indeces for an array of callsigns, -1 for
+            callsigns not found. Callsigns still unresolved are matched
+            against the prefixes grouped by prefix length, longest
+            first, truncating all of them to that length at once.
+        """
+        result = self._match (self.exact_keys, self.exact_vals, calls)
+        result = result.astype (np.int32)
+        for l in sorted (self.prefix_keys, reverse = True):
+            todo = np.flatnonzero (result < 0)
+            if not len (todo):
+                break
+            trunc = calls [todo].astype ('U%d' % l)
+            result [todo] = self._match \
+                (self.prefix_keys [l], self.prefix_vals [l], trunc)
+        return result
+    # end def lookup
+
+# end class CTY_Compiled
+
+class CTY_Shared_Tables:
+    """ Compiled tables in the flat format in a shared memory block.
+        Created with a CTY_Compiled object the block is allocated,
+        other processes attach to it by name, the compiled attribute
+        then has arrays pointing into the shared memory.
+        Processes not started by the creator should attach with
+        track = False, otherwise the shared memory is removed when
+        they exit. Needs Python 3.8 or later.
+    """
+
+    # Names of the blocks created by this process
+    created = set ()
+
+    def __init__ (self, compiled = None, name = None, track = True):
+        from multiprocessing.shared_memory import SharedMemory
+        self.owner = compiled is not None
+        if self.owner:
+            data = compiled.to_bytes ()
+            self.shm = SharedMemory (create = True, size = len (data))
+            self.shm.buf [:len (data)] = data
+            self.created.add (self.shm.name)
+            self.compiled = compiled
+        else:
+            try:
+                self.shm = SharedMemory (name, track = track)
+            except TypeError:
+                self.shm = SharedMemory (name)
+                # Only posix registers with the tracker, with leading '/'
+                # Don't remove the registration of the creator
+                if  (  not track and os.name == 'posix'
+                    and self.shm.name not in self.created
+                    ):
+                    from multiprocessing import resource_tracker
+                    resource_tracker.unregister \
+                        ('/' + self.shm.name, 'shared_memory')
+            self.compiled = CTY_Compiled.from_buffer (self.shm.buf)
+    # end def __init__
+
+    @property
+    def name (self):
+        return self.shm.name
+    # end def name
+
+    def close (self):
+        """ Close, the creator also removes the shared memory.
+            Arrays of the compiled tables must not be used afterwards.
+        """
+        if self.shm is None:
+            return
+        self.compiled = None
+        self.shm.close ()
+        if self.owner:
+            self.created.discard (self.shm.name)
+            self.shm.unlink ()
+        self.shm = None
+    # end def close
+
+# end class CTY_Shared_Tables
+
+class CTY_Pool (ProcessPoolExecutor):
+    """ Process pool for batch lookups: The compiled tables are put
+        into shared memory once, workers attach to it on startup.
+    """
+
+    def __init__ (self, compiled, workers):
+        self.compiled = compiled
+        self.shared   = CTY_Shared_Tables (compiled)
+        ProcessPoolExecutor.__init__ \
+            ( self, workers
+            , initializer = _worker_attach
+            , initargs    = (self.shared.name,)
+            )
+    # end def __init__
+
+    def shutdown (self, *args, **kw):
+        ProcessPoolExecutor.shutdown (self, *args, **kw)
+        self.shared.close ()
+    # end def shutdown
+
+# end class CTY_Pool
+
+class CTY_Headings:
+    """ Short and long path bearing (degrees) and distance (km) from a
+        home position to the position of every record of a CTY_Compiled,
+        including the prefixes and callsigns that override the position
+        of their entity. The arrays are aligned with the records, the
+        last element (index -1, callsign not found) is NaN, so a spot
+        gets its heading with a single index into the arrays.
+    """
+
+    def __init__ (self, compiled, lat, lon):
+        self.compiled = compiled
+        self.home     = (lat, lon)
+        short, bearing = batch_great_circle \
+            (lat, lon, compiled.lat, compiled.lon)
+        self.short_distance = short
+        self.short_bearing  = bearing
+        self.long_distance  = 2 * math.pi * earth_radius - short
+        self.long_bearing   = (bearing + 180) % 360
+    # end def __init__
+
+    def batch_lookup (self, callsigns):
+        """ Arrays of short path bearing and distance and long path
+            bearing and distance for many callsigns (NaN if not found)
+        """
+        rec = self.compiled.lookup (callsign_array (callsigns))
+        return \
+            ( self.short_bearing [rec], self.short_distance [rec]
+            , self.long_bearing  [rec], self.long_distance  [rec]
+            )
+    # end def batch_lookup
+
+    def lookup (self, callsign):
+        """ Short path bearing and distance and long path bearing and
+            distance for a single callsign, None if not found
+        """
+        r = [float (a [0]) for a in self.batch_lookup ([callsign])]
+        if math.isnan (r [0]):
+            return None
+        return tuple (r)
+    # end def lookup
+
+# end class CTY_Headings
+
+_worker_shared   = None
+_worker_compiled = None
+
+def _worker_attach (name):
+    global _worker_shared, _worker_compiled
+    _worker_shared   = CTY_Shared_Tables (name = name)
+    _worker_compiled = _worker_shared.compiled
+# end def _worker_attach
+
+def _worker_lookup (calls):
+    return _worker_compiled.lookup (calls)
+# end def _worker_lookup
+
+def callsign_array (callsigns):
+    """ Convert a sequence, numpy array or arrow column of callsigns
+        to a numpy unicode array, missing values become empty strings.
+    """
+    if hasattr (callsigns, 'to_numpy') and not isinstance \
+        (callsigns, np.ndarray):
+        try:
+            callsigns = callsigns.to_numpy (zero_copy_only = False)
+        except TypeError:
+            callsigns = callsigns.to_numpy ()
+    calls = np.asarray (callsigns)
+    if calls.dtype.kind == 'O':
+        calls = calls.copy ()
+        calls [calls == None] = ''
+    if calls.dtype.kind != 'U':
+        calls = calls.astype (str)
+    return calls
+# end def callsign_array
+
+class CTY_Diff:
+    """ Differences between two CTY_Table objects old and new.
+        For prefixes and exact callsigns we record which were added,
+        removed or now map to a different country and which have
+        changed overrides (zones, position etc. given after the
+        prefix). Countries with changed fields invalidate all their
+        prefixes and callsigns. Results cached for a callsign are
+        stale if invalidates returns True for it.
+    """
+
+    fields = ('cq', 'itu', 'continent', 'lat', 'lon', 'gmtoff')
+
+    def __init__ (self, old, new):
+        self.added_prefix,   self.removed_prefix,   self.changed_prefix = \
+            self._compare (old.prefix, new.prefix)
+        self.added_exact,    self.removed_exact,    self.changed_exact  = \
+            self._compare (old.exact_callsign, new.exact_callsign)
+        self.override_prefix = self._overrides \
+            (old.prefix_override, new.prefix_override)
+        self.override_exact  = self._overrides \
+            (old.exact_override, new.exact_override)
+        self.added_countries   = set (new.countries) - set (old.countries)
+        self.removed_countries = set (old.countries) - set (new.countries)
+        self.changed_countries = set \
+            (c for c in new.countries
+             if  c in old.countries
+             and self._fields (old.countries [c])
+             !=  self._fields (new.countries [c])
+            )
+        self.prf_max = max (old.prf_max, new.prf_max)
+        self.prefixes = set (self.added_prefix)
+        self.prefixes.update (self.removed_prefix)
+        self.prefixes.update (self.changed_prefix)
+        self.prefixes.update (self.override_prefix)
+        self.exact = set (self.added_exact)
+        self.exact.update (self.removed_exact)
+        self.exact.update (self.changed_exact)
+        self.exact.update (self.override_exact)
+        if self.changed_countries:
+            for t in old, new:
+                self.prefixes.update \
+                    (k for k, v in t.prefix.items ()
+                     if v in self.changed_countries
+                    )
+                self.exact.update \
+                    (k for k, v in t.exact_callsign.items ()
+                     if v in self.changed_countries
+                    )
+    # end def __init__
+
+    @classmethod
+    def _fields (cls, entity):
+        if entity is None:
+            return None
+        return tuple (getattr (entity, k) for k in cls.fields)
+    # end def _fields
+
+    @classmethod
+    def _overrides (cls, old, new):
+        """ Keys with an override in old or new that differs """
+        return set \
+            (k for k in set (old) | set (new)
+             if cls._fields (old.get (k)) != cls._fields (new.get (k))
+            )
+    # end def _overrides
+
+    @staticmethod
+    def _compare (old, new):
+        added   = dict ((k, new [k]) for k in new if k not in old)
+        removed = dict ((k, old [k]) for k in old if k not in new)
+        changed = dict \
+            ((k, (old [k], new [k])) for k in new
+             if k in old and old [k] != new [k]
+            )
+        return added, removed, changed
+    # end def _compare
+
+    def invalidates (self, callsign):
+        """ Return True if the lookup result for callsign may differ
+            between old and new table.
+        """
+        if callsign in self.exact:
+            return True
+        for n in range (self.prf_max):
+            if callsign [:n+1] in self.prefixes:
+                return True
+        return False
+    # end def invalidates
+
+    def __bool__ (self):
+        return bool \
+            (  self.prefixes or self.exact
+            or self.added_countries or self.removed_countries
+            or self.changed_countries
+            )
+    # end def __bool__
+
+    def __str__ (self):
+        r = []
+        for name in 'prefix', 'exact':
+            for k in 'added', 'removed', 'changed':
+                v = getattr (self, '%s_%s' % (k, name))
+                if v:
+                    r.append ('%s %s: %s' % (k, name, ','.join (sorted (v))))
+            v = getattr (self, 'override_%s' % name)
+            if v:
+                r.append \
+                    ('changed override %s: %s' % (name, ','.join (sorted (v))))
+        for k in 'added', 'removed', 'changed':
+            v = getattr (self, '%s_countries' % k)
+            if v:
+                r.append ('%s countries: %s' % (k, ', '.join (sorted (v))))
+        return '\n'.join (r)
+    # end def __str__
+    __repr__ = __str__
+
+# end class CTY_Diff
+
+class CTY:
+    """ Parse Country information in cty.dat format
+        Docs: https://www.country-files.com/cty-dat-format/
+        The parsed tables live in self.table, a reload builds a new
+        table and replaces the old one with a single assignment, so
+        lookups never need a lock and always see either the old or
+        the new table.
+    """
+
+    data     = os.path.join (os.path.dirname (__file__), 'data', 'cty.dat')
+    suffixes = CTY_Table.suffixes
+
+    def __init__ (self, filename):
+        self.filename    = filename
+        self.table       = CTY_Table (filename)
+        self.reload_lock = threading.Lock ()
+    # end def __init__
+
+    @property
+    def countries (self):
+        return self.table.countries
+    # end def countries
+
+    @property
+    def exact_callsign (self):
+        return self.table.exact_callsign
+    # end def exact_callsign
+
+    @property
+    def prefix (self):
+        return self.table.prefix
+    # end def prefix
+
+    @property
+    def prf_max (self):
+        return self.table.prf_max
+    # end def prf_max
+
+    def callsign_lookup (self, callsign):
+        return self.table.callsign_lookup (callsign)
+    # end def callsign_lookup
+
+    def callsign_info (self, callsign):
+        return self.table.callsign_info (callsign)
+    # end def callsign_info
+
+    def worker_pool (self, workers):
+        """ Process pool for batch lookups, the workers share the
+            compiled tables of the current table via shared memory.
+            The pool can be passed to batch_records and batch_lookup
+            for repeated lookups, note that it keeps using the table
+            it was created with.
+        """
+        return CTY_Pool (self.table.compiled, workers)
+    # end def worker_pool
+
+    def batch_records \
+        (self, callsigns, workers = None, chunksize = 1000000, pool = None):
+        """ Look up many callsigns at once, callsigns can be any
+            sequence, a numpy array or an arrow column.
+            Returns the CTY_Compiled object used and a numpy array of
+            indeces into its records (-1 if not found). Each distinct
+            callsign is looked up only once. With workers > 1 (or a
+            pool from worker_pool) the distinct callsigns are split into
+            chunks of chunksize that are looked up by a process pool.
+        """
+        compiled = pool.compiled if pool else self.table.compiled
+        calls    = callsign_array (callsigns)
+        uniq, inverse = np.unique (calls, return_inverse = True)
+        if (pool or workers and workers > 1) and len (uniq) > chunksize:
+            chunks = \
+                [ uniq [i:i+chunksize]
+                  for i in range (0, len (uniq), chunksize)
+                ]
+            if pool:
+                rec = list (pool.map (_worker_lookup, chunks))
+            else:
+                with self.worker_pool (workers) as pool:
+                    rec = list (pool.map (_worker_lookup, chunks))
+            rec = np.concatenate (rec)
+        else:
+            rec = compiled.lookup (uniq)
+        return compiled, rec [inverse.reshape (-1)]
+    # end def batch_records
+
+    def batch_lookup (self, callsigns, workers = None, **kw):
+        """ Like batch_records but return three numpy arrays: The index
+            of the entity in self.table.entities (-1 if not found), the
+            CQ and the ITU zone (0 if not found).
+        """
+        compiled, rec = self.batch_records (callsigns, workers, **kw)
+        return compiled.entity [rec], compiled.cq [rec], compiled.itu [rec]
+    # end def batch_lookup
+
+    def headings (self, home):
+        """ Bearing/distance table from home (locator or (lat, lon))
+            for the current table, see CTY_Headings
+        >>> cty = CTY (CTY.data)
+        >>> h = cty.headings ('JN88ef')
+        >>> print ('%.0f %.0f %.0f %.0f' % h.lookup ('W1AW'))
+        308 8128 128 31902
+        >>> h.lookup ('') is None
+        True
+        """
+        return self.table.compiled.headings (home)
+    # end def headings
+
+    def reload (self, filename = None):
+        """ Parse filename (default: the file we were loaded from) and
+            swap in the new table. Returns a CTY_Diff from the old to
+            the new table. Readers are not blocked, only concurrent
+            reloads are serialized.
+        """
+        with self.reload_lock:
+            filename   = filename or self.filename
+            table      = CTY_Table (filename)
+            old        = self.table
+            self.table = table
+            self.filename = filename
+        return old.diff (table)
+    # end def reload
+
+    def reload_if_changed (self):
+        """ Reload only if the modification time of our file changed.
+            Returns the CTY_Diff or None if nothing was reloaded.
+        """
+        if os.stat (self.filename).st_mtime != self.table.mtime:
+            return self.reload ()
+    # end def reload_if_changed
+
+    def reload_background (self, filename = None, callback = None):
+        """ Reload in a separate thread, callback (if given) is called
+            with the CTY_Diff when the new table is in place.
+            Returns the started thread.
+        """
+        def run ():
+            diff = self.reload (filename)
+            if callback:
+                callback (diff)
+        thread = threading.Thread (target = run, daemon = True)
+        thread.start ()
+        return thread
+    # end def reload_background
+
 # end class CTY
 
 class CTY_DXCC:
@@ -217,26 +989,189 @@ class CTY_DXCC:
         Also the names in CTY are not the same as in DXCC.
     """
 
-    def __init__ (self):
-        dxcc = DXCC_File ()
-        dxcc.parse ()
-        self.dxcc = dxcc.by_type ['CURRENT']
-        self.cty  = CTY (CTY.data)
+    def __init__ (self, exceptions = None, dxcc = None):
+        """ If given, exceptions is a Clublog_Exceptions object or the
+            name of a Club Log cty.xml file, it is used for dated
+            lookups. An already parsed DXCC_File can be passed in dxcc.
+        """
+        if dxcc is None:
+            dxcc = DXCC_File ()
+            dxcc.parse ()
+        self.dxcc_file = dxcc
+        self.dxcc  = dxcc.by_type ['CURRENT']
+        self.cty   = CTY (CTY.data)
+        self.codes = None
+        if isinstance (exceptions, str):
+            exceptions = Clublog_Exceptions (exceptions)
+        self.exceptions = exceptions
+        self._history   = None
     # end def __init__
 
-    def callsign_lookup (self, call):
+    @property
+    def history (self):
+        """ Index of current and deleted entities, built on first use
+        """
+        if self._history is None:
+            self._history = DXCC_History (self.dxcc_file)
+        return self._history
+    # end def history
+
+    def by_code (self, code):
+        """ DXCC entity (current or deleted) by numeric code or None
+        """
+        code = '%03d' % int (code)
+        for t in 'CURRENT', 'DELETED':
+            if t in self.dxcc_file.by_type:
+                e = self.dxcc_file.by_type [t].by_code.get (code)
+                if e is not None:
+                    return e
+    # end def by_code
+
+    def dxcc_entity (self, name):
+        """ DXCC entity for a CTY country name
+        """
+        name = darc_waedc_dxcc.get (name, name)
+        name = cty_to_dxcc.get     (name, name)
+        return self.dxcc.by_name [name]
+    # end def dxcc_entity
+
+    def callsign_lookup (self, call, date = None):
         """ Look up a DXCC entity of a callsign via CTY
             For compatibility with the DXCC lookup which can contain
             multiple matches we return a (one-element) list.
+            If the date of the QSO is given and we have dated
+            exceptions, these take precedence, an invalid operation
+            returns an empty list. Then deleted entities valid at that
+            date are checked.
         """
+        if date is not None and self.exceptions is not None:
+            if self.exceptions.is_invalid (call, date):
+                return []
+            r = self.exceptions.exception (call, date)
+            if r is not None and r.adif:
+                e = self.by_code (r.adif)
+                if e is not None:
+                    return [e]
+        if date is not None:
+            r = [e for e in self.history.callsign_lookup (call, date)
+                 if e.deleted
+                ]
+            if r:
+                return r
         name = self.cty.callsign_lookup (call)
         if name is None:
             return []
-        name = darc_waedc_dxcc.get (name, name)
-        name = cty_to_dxcc.get     (name, name)
-        return [self.dxcc.by_name [name]]
+        return [self.dxcc_entity (name)]
     # end def dxcc_lookup
 
+    def batch_lookup (self, callsigns, workers = None, **kw):
+        """ Like CTY.batch_lookup but return the numeric DXCC entity
+            code (as used in ADIF) instead of the CTY entity index.
+            Entities not found (or not in the DXCC list) get -1.
+        """
+        table = self.cty.table
+        if self.codes is None or self.codes [0] is not table:
+            codes = []
+            for e in table.entities:
+                try:
+                    codes.append (int (self.dxcc_entity (e.name).code))
+                except KeyError:
+                    codes.append (-1)
+            codes.append (-1)
+            self.codes = (table, np.array (codes, dtype = np.int32))
+        entity, cq, itu = self.cty.batch_lookup (callsigns, workers, **kw)
+        return self.codes [1][entity], cq, itu
+    # end def batch_lookup
+
+    def _record_fields (self, r):
+        """ Output fields for a CTY_Entity (or None if not found)
+        """
+        d = dict.fromkeys (self.stream_fields)
+        if r is not None:
+            d.update (entity = r.name, cq = r.cq, itu = r.itu)
+            d.update (continent = r.continent)
+            try:
+                e = self.dxcc_entity (r.name)
+                d.update (dxcc = int (e.code), entity = e.name)
+            except KeyError:
+                pass
+        return d
+    # end def _record_fields
+
+    def _format (self, d, format):
+        """ Format output fields without callsign, for json we return
+            the object without the opening brace.
+        """
+        if format == 'json':
+            return json.dumps (d) [1:]
+        return '\t'.join \
+            ('' if d [k] is None else str (d [k]) for k in self.stream_fields)
+    # end def _format
+
+    stream_fields = ('dxcc', 'entity', 'cq', 'itu', 'continent')
+
+    def stream \
+        ( self, infile, outfile
+        , format    = 'tsv'
+        , workers   = None
+        , chunksize = 100000
+        ):
+        """ Read callsigns from infile (the first word of each line) and
+            write one line per callsign with DXCC code, entity name,
+            zones and continent as tab separated values or JSON lines.
+            Lines are processed in chunks of chunksize with the batch
+            lookup if numpy is available. The output for each CTY record
+            is formatted only once.
+        """
+        if format == 'json':
+            def line (call, text):
+                return '{"call": %s, %s' % (json.dumps (call), text)
+        else:
+            def line (call, text):
+                return '%s\t%s' % (call, text)
+        texts = {}
+        pool  = None
+        if np is not None and workers and workers > 1:
+            pool = self.cty.worker_pool (workers)
+        try:
+            while True:
+                lines = list (islice (infile, chunksize))
+                if not lines:
+                    break
+                calls = [(l.split () or [''])[0].upper () for l in lines]
+                if np is None:
+                    out = []
+                    for c in calls:
+                        if c not in texts:
+                            r = self.cty.callsign_info (c)
+                            texts [c] = self._format \
+                                (self._record_fields (r), format)
+                        out.append (line (c, texts [c]))
+                else:
+                    kw = {}
+                    if pool:
+                        kw ['pool'] = pool
+                        kw ['chunksize'] = len (lines) // workers + 1
+                    compiled, rec = self.cty.batch_records (calls, **kw)
+                    if texts.get (None) is not compiled:
+                        recs  = compiled.records + [None]
+                        texts = {}
+                        for i, r in enumerate (recs):
+                            texts [i] = self._format \
+                                (self._record_fields (r), format)
+                        texts [-1]   = texts [len (recs) - 1]
+                        texts [None] = compiled
+                    out = \
+                        [ line (c, texts [r])
+                          for c, r in zip (calls, rec.tolist ())
+                        ]
+                outfile.write ('\n'.join (out))
+                outfile.write ('\n')
+        finally:
+            if pool:
+                pool.shutdown ()
+    # end def stream
+
 # end class CTY_DXCC
 
 if __name__ == '__main__':
@@ -0,0 +1,463 @@
+#!/usr/bin/python3
+# Copyright (C) 2026 Dr. Ralf Schlatterbeck Open Source Consulting.
+# Reichergasse 131, A-3411 Weidling.
+# Web: http://www.runtux.com Email: office@runtux.com
+# ****************************************************************************
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS
+# IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED
+# TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A
+# PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED
+# TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ****************************************************************************
+
+""" Resident callsign lookup server
+    The server loads the cty.dat and DXCC tables once and answers
+    lookups over a Unix domain socket or via HTTP on localhost.
+    On the Unix socket the protocol is line based: Each request is a
+    line containing a JSON object, the answer is one line with a JSON
+    object. A line that is not a JSON object is taken as a callsign.
+    Requests can be pipelined, i.e., a client may send many requests
+    before reading the answers, answers come in request order.
+    A request is either {"call": "DL1ABC"} or a batch of callsigns
+    {"calls": ["DL1ABC", "OE3RSU"]}, both may contain a "date" of the
+    QSO. The answer to a single lookup contains the fields of the CTY
+    entity (name, prefix, cq, itu, continent, lat, lon, gmtoff) and the
+    DXCC code and entity name, the name is missing if the callsign was
+    not found. A batch is answered with {"results": [...]}.
+    Via HTTP the same request objects (or a list of them) are POSTed,
+    a GET with a call parameter is also supported.
+"""
+
+import os
+import sys
+import json
+import socket
+import threading
+import socketserver
+from argparse           import ArgumentParser
+from http.server        import ThreadingHTTPServer, BaseHTTPRequestHandler
+from http.client        import HTTPConnection
+from urllib.parse       import urlparse, parse_qs
+from hamradio.cty       import CTY_DXCC, CTY_Entity
+
+class CTY_Service:
+    """ Answer lookup requests from a CTY_DXCC object.
+        The answer for each CTY record is computed only once per
+        cty.dat table and cached.
+    """
+
+    fields = ('name', 'prefix', 'cq', 'itu', 'continent', 'lat', 'lon', 'gmtoff')
+
+    def __init__ (self, cty_dxcc = None):
+        if cty_dxcc is None:
+            cty_dxcc = CTY_DXCC ()
+        self.cty_dxcc = cty_dxcc
+        self.cache    = (None, {})
+    # end def __init__
+
+    def record (self, entity):
+        """ Answer fields of a CTY_Entity
+        """
+        table = self.cty_dxcc.cty.table
+        if self.cache [0] is not table:
+            self.cache = (table, {})
+        cache = self.cache [1]
+        if id (entity) not in cache:
+            d = dict ((k, getattr (entity, k)) for k in self.fields)
+            try:
+                e = self.cty_dxcc.dxcc_entity (entity.name)
+                d.update (dxcc = int (e.code), entity = e.name)
+            except KeyError:
+                pass
+            cache [id (entity)] = (entity, d)
+        return cache [id (entity)][1]
+    # end def record
+
+    def lookup (self, call, date = None):
+        """ Answer for a single call, errors (e.g. a CTY entity
+            without DXCC entity or an invalid date) are reported in
+            the answer for this call only.
+        """
+        call = call.strip ().upper ()
+        r    = dict (call = call)
+        e    = self.cty_dxcc.cty.callsign_info (call)
+        if e is not None:
+            r.update (self.record (e))
+        if date:
+            r.pop ('dxcc', None)
+            r.pop ('entity', None)
+            try:
+                d = self.cty_dxcc.callsign_lookup (call, date)
+            except KeyError as err:
+                r.update (error = 'No DXCC entity for %s' % err)
+                return r
+            except ValueError as err:
+                r.update (error = 'Invalid request: %s' % err)
+                return r
+            if d:
+                r.update (dxcc = int (d [0].code), entity = d [0].name)
+        return r
+    # end def lookup
+
+    def answer (self, request):
+        """ Answer a single request, a dict or a callsign
+        """
+        if not isinstance (request, dict):
+            return self.lookup (str (request))
+        date = request.get ('date')
+        try:
+            if 'calls' in request:
+                return dict \
+                    (results = [self.lookup (c, date) for c in request ['calls']])
+            return self.lookup (request ['call'], date)
+        except (KeyError, ValueError, AttributeError) as err:
+            return dict (error = 'Invalid request: %s' % err)
+    # end def answer
+
+    def answer_line (self, line):
+        """ Answer a line of the Unix socket protocol
+        """
+        line = line.strip ()
+        if line.startswith (b'{'):
+            try:
+                request = json.loads (line)
+            except ValueError as err:
+                return json.dumps (dict (error = 'Invalid JSON: %s' % err))
+        else:
+            request = line.decode ('ascii', 'replace')
+        return json.dumps (self.answer (request))
+    # end def answer_line
+
+# end class CTY_Service
+
+class CTY_Stream_Handler (socketserver.BaseRequestHandler):
+    """ Handle a connection of the line based protocol.
+        We read what is available, answer all complete lines and send
+        the answers with a single write. This way pipelined requests
+        are answered in batches.
+    """
+
+    bufsize = 65536
+
+    def handle (self):
+        service = self.server.service
+        rest    = b''
+        while True:
+            data = self.request.recv (self.bufsize)
+            if not data:
+                break
+            lines = (rest + data).split (b'\n')
+            rest  = lines.pop ()
+            if lines:
+                answer = '\n'.join (service.answer_line (l) for l in lines)
+                self.request.sendall (answer.encode ('utf-8') + b'\n')
+    # end def handle
+
+# end class CTY_Stream_Handler
+
+class CTY_Unix_Server (socketserver.ThreadingUnixStreamServer):
+    """ Lookup server on a Unix domain socket
+    """
+
+    daemon_threads = True
+
+    def __init__ (self, path, service):
+        self.service = service
+        if os.path.exists (path):
+            os.unlink (path)
+        socketserver.ThreadingUnixStreamServer.__init__ \
+            (self, path, CTY_Stream_Handler)
+    # end def __init__
+
+    def server_close (self):
+        socketserver.ThreadingUnixStreamServer.server_close (self)
+        if os.path.exists (self.server_address):
+            os.unlink (self.server_address)
+    # end def server_close
+
+# end class CTY_Unix_Server
+
+class CTY_HTTP_Handler (BaseHTTPRequestHandler):
+    """ Answer lookups via HTTP, we use HTTP/1.1 so that clients can
+        keep the connection open.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately, avoid delayed ACK stalls
+    disable_nagle_algorithm = True
+
+    def reply (self, result, status = 200):
+        body = json.dumps (result).encode ('utf-8')
+        self.send_response (status)
+        self.send_header ('Content-Type', 'application/json')
+        self.send_header ('Content-Length', str (len (body)))
+        self.end_headers ()
+        self.wfile.write (body)
+    # end def reply
+
+    def do_GET (self):
+        service = self.server.service
+        query   = parse_qs (urlparse (self.path).query)
+        if 'call' not in query:
+            self.reply (dict (error = 'Missing call parameter'), 400)
+            return
+        date = query.get ('date', [None])[0]
+        self.reply (service.answer (dict (calls = query ['call'], date = date)))
+    # end def do_GET
+
+    def do_POST (self):
+        service = self.server.service
+        length  = int (self.headers.get ('Content-Length', 0))
+        try:
+            request = json.loads (self.rfile.read (length))
+        except ValueError as err:
+            self.reply (dict (error = 'Invalid JSON: %s' % err), 400)
+            return
+        if isinstance (request, list):
+            self.reply ([service.answer (r) for r in request])
+        else:
+            self.reply (service.answer (request))
+    # end def do_POST
+
+    def log_message (self, format, *args):
+        if self.server.verbose:
+            BaseHTTPRequestHandler.log_message (self, format, *args)
+    # end def log_message
+
+# end class CTY_HTTP_Handler
+
+class CTY_HTTP_Server (ThreadingHTTPServer):
+    """ Lookup server via HTTP, by default only on localhost
+    """
+
+    def __init__ (self, port, service, host = 'localhost', verbose = False):
+        self.service = service
+        self.verbose = verbose
+        ThreadingHTTPServer.__init__ (self, (host, port), CTY_HTTP_Handler)
+    # end def __init__
+
+# end class CTY_HTTP_Server
+
+class CTY_Client:
+    """ Client for the lookup server, either via the Unix socket given
+        with path or via HTTP with url (e.g. http://localhost:7373).
+        The interface mirrors CTY: callsign_lookup returns the name of
+        the cty.dat entity, callsign_info a CTY_Entity with additional
+        attributes dxcc and entity (the DXCC code and name, None if not
+        in the DXCC list). The batch_info method looks up many
+        callsigns with pipelined batch requests.
+    """
+
+    batchsize = 1000
+    window    = 16
+
+    def __init__ (self, path = None, url = None, timeout = None):
+        if not path and not url:
+            raise ValueError ("Need either path or url")
+        self.path    = path
+        self.url     = url
+        self.timeout = timeout
+        self.conn    = None
+        self.lock    = threading.Lock ()
+    # end def __init__
+
+    def connect (self):
+        if self.conn is None:
+            if self.path:
+                s = socket.socket (socket.AF_UNIX, socket.SOCK_STREAM)
+                s.settimeout (self.timeout)
+                s.connect (self.path)
+                self.conn = s
+                self.rfile = s.makefile ('rb')
+            else:
+                u = urlparse (self.url)
+                self.conn = HTTPConnection \
+                    (u.hostname, u.port or 80, timeout = self.timeout)
+    # end def connect
+
+    @staticmethod
+    def shutdown (conn):
+        try:
+            conn.shutdown (socket.SHUT_RDWR)
+        except OSError:
+            pass
+    # end def shutdown
+
+    def close (self):
+        if self.conn is not None:
+            if self.path:
+                self.rfile.close ()
+            self.conn.close ()
+            self.conn = None
+    # end def close
+
+    def __enter__ (self):
+        return self
+    # end def __enter__
+
+    def __exit__ (self, *args):
+        self.close ()
+    # end def __exit__
+
+    def _http (self, requests):
+        body = json.dumps (requests).encode ('utf-8')
+        hdr  = {'Content-Type': 'application/json'}
+        self.conn.request ('POST', '/', body, hdr)
+        r = self.conn.getresponse ()
+        return json.loads (r.read ())
+    # end def _http
+
+    def request (self, requests):
+        """ Send a list of requests and return the list of answers.
+            On the Unix socket the requests are sent (window requests
+            per send) by a writer thread while we read the answers, so
+            neither side blocks on full socket buffers.
+        """
+        with self.lock:
+            self.connect ()
+            if not self.path:
+                return self._http (requests)
+            conn    = self.conn
+            answers = []
+            errors  = []
+            lines   = [self.encode (r) for r in requests]
+            def send ():
+                try:
+                    for i in range (0, len (lines), self.window):
+                        conn.sendall (b''.join (lines [i:i+self.window]))
+                except OSError as err:
+                    errors.append (err)
+                    # Wake up the reader
+                    self.shutdown (conn)
+            writer = threading.Thread (target = send, daemon = True)
+            writer.start ()
+            try:
+                for l in lines:
+                    line = self.rfile.readline ()
+                    if not line:
+                        if errors:
+                            raise errors [0]
+                        raise ConnectionError ("Connection closed by server")
+                    answers.append (json.loads (line))
+            except BaseException:
+                # Wake up the writer
+                self.shutdown (conn)
+                writer.join ()
+                self.close ()
+                raise
+            writer.join ()
+            return answers
+    # end def request
+
+    @staticmethod
+    def encode (request):
+        """ A request line, callsigns are sent as they are, the
+            server decodes only lines starting with '{' as JSON.
+        """
+        if isinstance (request, dict):
+            return json.dumps (request).encode ('utf-8') + b'\n'
+        return str (request).strip ().encode ('utf-8') + b'\n'
+    # end def encode
+
+    @staticmethod
+    def entity (answer):
+        """ Convert an answer to a CTY_Entity (or None if not found)
+            An error for a call with a CTY entity (e.g. one without
+            DXCC entity) yields the entity without dxcc.
+        """
+        if 'error' in answer and 'name' not in answer:
+            raise ValueError (answer ['error'])
+        if 'name' not in answer:
+            return None
+        e = CTY_Entity.__new__ (CTY_Entity)
+        e.__dict__.update \
+            ((k, answer [k]) for k in CTY_Service.fields)
+        e.dxcc   = answer.get ('dxcc')
+        e.entity = answer.get ('entity')
+        e.index  = None
+        e.base   = e
+        return e
+    # end def entity
+
+    def callsign_info (self, callsign, date = None):
+        return self.entity (self.request ([dict (call = callsign, date = date)])[0])
+    # end def callsign_info
+
+    def callsign_lookup (self, callsign, date = None):
+        e = self.callsign_info (callsign, date)
+        if e is not None:
+            return e.name
+    # end def callsign_lookup
+
+    def batch_info (self, callsigns, date = None):
+        """ Look up many callsigns, return a list of CTY_Entity (or None)
+        """
+        calls = list (callsigns)
+        reqs  = \
+            [ dict (calls = calls [i:i+self.batchsize], date = date)
+              for i in range (0, len (calls), self.batchsize)
+            ]
+        result = []
+        for a in self.request (reqs):
+            if 'error' in a:
+                raise ValueError (a ['error'])
+            result.extend (self.entity (r) for r in a ['results'])
+        return result
+    # end def batch_info
+
+# end class CTY_Client
+
+def main ():
+    cmd = ArgumentParser ()
+    cmd.add_argument \
+        ( "-p", "--port"
+        , help    = "Serve via HTTP on this port of localhost"
+        , type    = int
+        )
+    cmd.add_argument \
+        ( "-s", "--socket"
+        , help    = "Serve via this Unix domain socket, default=%(default)s"
+        , default = '/tmp/cty-lookup.sock'
+        )
+    cmd.add_argument \
+        ( "-v", "--verbose"
+        , help    = "Log HTTP requests"
+        , action  = 'store_true'
+        )
+    cmd.add_argument \
+        ( "-x", "--exceptions"
+        , help    = "Club Log cty.xml file with dated callsign exceptions"
+        )
+    args    = cmd.parse_args ()
+    service = CTY_Service (CTY_DXCC (exceptions = args.exceptions))
+    if args.port:
+        server = CTY_HTTP_Server (args.port, service, verbose = args.verbose)
+    else:
+        server = CTY_Unix_Server (args.socket, service)
+    try:
+        server.serve_forever ()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close ()
+# end def main
+
+if __name__ == '__main__':
+    main ()
@@ -100,6 +100,14 @@ class Log_Mixin (autosuper):
 class ADIF_Uploader (requester.Requester, Log_Mixin):
 
     date_format = '%Y-%m-%d.%H:%M:%S'
+    # Lookup tables that hardly ever change: Use cached result for a day
+    cache_ttl   = \
+        { r'/ham_band\?'     : 86400
+        , r'/antenna\?'      : 86400
+        , r'/dxcc_entity\?'  : 86400
+        , r'/qsl_type\?'     : 86400
+        , r'/ham_mode/\d+\?' : 86400
+        }
 
     def __init__ \
         ( self
@@ -109,9 +117,14 @@ class ADIF_Uploader (requester.Requester, Log_Mixin):
         , dry_run  = False
         , verbose  = False
         , antenna  = []
+        , **kw
         ):
         self.__super.__init__ \
-            (url, username, password, dry_run = dry_run, verbose = verbose)
+            ( url, username, password
+            , dry_run = dry_run
+            , verbose = verbose
+            , **kw
+            )
         self.dry_run = dry_run
         self.set_basic_auth ()
         if self.url.endswith ('/'):
@@ -483,7 +496,16 @@ class DB_Importer (Log_Mixin):
 
     def __init__ (self, args):
         self.__super.__init__ (args.dry_run, args.verbose)
-        self.args = args
+        self.args  = args
+        self.stats = None
+        if args.stats:
+            self.stats = requester.Request_Stats ()
+        cache = None
+        if not args.no_cache:
+            cache = requester.Response_Cache \
+                ( directory = args.cache_dir
+                , ttl       = ADIF_Uploader.cache_ttl
+                )
         self.au = ADIF_Uploader \
             ( args.url
             , args.username
@@ -491,7 +513,12 @@ class DB_Importer (Log_Mixin):
             , args.dry_run
             , args.verbose
             , args.antenna
+            , pool_maxsize = max
+                (args.concurrency, requester.Requester.pool_maxsize)
+            , cache        = cache
+            , stats        = self.stats
             )
+        self.aau = requester.Async_Requester (self.au, args.concurrency)
         self.au.set_call (args.call)
         cutoff = None
         if args.cutoff_date:
@@ -516,13 +543,33 @@ class DB_Importer (Log_Mixin):
                     )
             else:
                 assert 0
+            self.logbook.stats = self.stats
     # end def __init__
 
     def execute (self):
         method = getattr (self, 'do_' + self.args.command)
-        method ()
+        try:
+            method ()
+        finally:
+            self.aau.close ()
+            if self.stats:
+                if self.args.stats == 'json':
+                    print (self.stats.as_json (), file = sys.stderr)
+                else:
+                    print (self.stats.as_table (), file = sys.stderr)
     # end def execute
 
+    def iter_prefetched (self, s, method, arg):
+        """ Iterate over the collection s page by page, for all items
+            of a page call method with arg (item) concurrently, yield
+            item and result of method.
+        """
+        for items in self.au.iter_pages (s):
+            results = self.aau.map (method, (arg (i) for i in items))
+            for item, result in zip (items, results):
+                yield item, result
+    # end def iter_prefetched
+
     # Command methods start with 'do'
 
     def do_import (self):
@@ -547,6 +594,7 @@ class DB_Importer (Log_Mixin):
         self.adif.set_date_format (self.minute_date_format)
         ladif = self.logbook.get_qso (since = self.cutoff, mydetail = 'yes')
         ladif.set_date_format (self.minute_date_format)
+        records = []
         for r in self.adif.records:
             ds = r.get_date ()
             if cutoff and ds <= cutoff:
@@ -559,15 +607,27 @@ class DB_Importer (Log_Mixin):
                 self.notice ("Call: %s not in %s" % (r.call, qtype))
                 continue
             self.info ("Found %s in %s" % (r.call, qtype))
-            # look it up in DB
-            submode = r.dict.get ('submode', None)
-            qsl = self.au.find_qsl \
+            records.append (r)
+        # look them up in DB
+        def find_qsl (r):
+            return self.au.find_qsl \
                 ( r.call
                 , r.get_date ()
                 , type    = qtype
                 , mode    = r.get_mode ()
-                , submode = submode
+                , submode = r.dict.get ('submode', None)
                 )
+        # QSOs for which we created a QSL in this run
+        created = set ()
+        def key (r):
+            return \
+                (r.call, r.get_date (), r.get_mode (), r.dict.get ('submode'))
+        qsls = self.aau.map (find_qsl, records)
+        for r, qsl in zip (records, qsls):
+            submode = r.dict.get ('submode', None)
+            # An earlier record for the same QSO may have created it
+            if not qsl and key (r) in created:
+                qsl = find_qsl (r)
             if not qsl:
                 self.info ("Call: %s not found in DB" % r.call)
                 # Search QSO
@@ -589,6 +649,7 @@ class DB_Importer (Log_Mixin):
                         )
                     if not self.args.dry_run:
                         result = self.au.post ('qsl', json = d)
+                        created.add (key (r))
                     self.notice ("Call %s: Created QSL" % (r.call))
                 continue
             self.info ("Found %s in DB" % r.call)
@@ -621,11 +682,14 @@ class DB_Importer (Log_Mixin):
             , 'qsl_type'  : qtype
             , '@fields'   : 'qso'
             }
-        qsl = self.au.get ('qsl?' + urlencode (d))['data']['collection']
         adif = self.logbook.get_qso (since = self.cutoff, mydetail = 'yes')
         adif.set_date_format (self.au.date_format)
-        for n, q in enumerate (qsl):
-            qso = self.au.get ('qso/%s' % q ['qso']['id'])
+        qsl  = self.iter_prefetched \
+            ( 'qsl?' + urlencode (d)
+            , self.au.get
+            , lambda q: 'qso/%s' % q ['qso']['id']
+            )
+        for n, (q, qso) in enumerate (qsl):
             q ['QSO'] = qso ['data']['attributes']
             # Look it up by call in logbook
             call = q ['QSO']['call']
@@ -649,15 +713,16 @@ class DB_Importer (Log_Mixin):
         qtype = self.args.qsl_type
         adif = self.logbook.get_qso (since = self.cutoff, mydetail = 'yes')
         adif.set_date_format (self.au.date_format)
-        for n, a in enumerate (adif):
-            submode = a.dict.get ('submode', None)
-            qsl = self.au.find_qsl \
+        def find_qsl (a):
+            return self.au.find_qsl \
                 ( a.call
                 , a.get_date () [:16]
                 , type    = qtype
                 , mode    = a.get_mode ()
-                , submode = submode
+                , submode = a.dict.get ('submode', None)
                 )
+        qsls = self.aau.map (find_qsl, adif)
+        for n, (a, qsl) in enumerate (zip (adif, qsls)):
             if not qsl:
                 self.notice \
                     ( "Call: %s %s: no %s QSL found in DB"
@@ -861,13 +926,18 @@ class DB_Importer (Log_Mixin):
         """
         adif = ADIF ()
         adif.header = 'ADIF export RSC-QSO'
+        entries = []
         with open (self.args.listfile) as f:
             for line in f:
                 if line.startswith ('Call:'):
                     line = line.split (' ', 1)[1]
                 date, call = line.split () [:2]
-                qso = self.au.find_qso (call, date)
-                adif.append (self.au.qso_as_adif (qso ['id']))
+                entries.append ((call, date))
+        def qso_as_adif (call, date):
+            qso = self.au.find_qso (call, date)
+            return self.au.qso_as_adif (qso ['id'])
+        for rec in self.aau.map (qso_as_adif, *zip (*entries)):
+            adif.append (rec)
         if self.args.export_adif:
             fn = self.args.export_adif
             with io.open (fn, 'w', encoding = self.args.encoding) as f:
@@ -882,10 +952,10 @@ class DB_Importer (Log_Mixin):
         """
         adif = ADIF ()
         adif.header = 'ADIF export RSC-QSO'
-        q = self.au.get ('qso?' + self.args.adif_query)
-        q = q ['data']['collection']
-        for k in q:
-            adif.append (self.au.qso_as_adif (k ['id']))
+        q   = self.au.stream_collection ('qso?' + self.args.adif_query)
+        ids = (k ['id'] for k in q)
+        for rec in self.aau.map (self.au.qso_as_adif, ids):
+            adif.append (rec)
         if self.args.export_adif:
             fn = self.args.export_adif
             with io.open (fn, 'w', encoding = self.args.encoding) as f:
@@ -905,14 +975,17 @@ class DB_Importer (Log_Mixin):
         }
         if self.cutoff:
             d ['qso_start'] = self.cutoff.strftime (self.au.date_format)
-        qso = self.au.get ('qso?' + urlencode (d))
-        qso = qso ['data']['collection']
         if self.args.export_adif:
             adif = ADIF ()
             adif.header = 'ADIF export RSC-QSO'
-        for n, q in enumerate (qso):
+        qso = self.iter_prefetched \
+            ( 'qso?' + urlencode (d)
+            , self.au.get
+            , lambda q: 'qsl?qso=%s&qsl_type=%s' % (q ['id'], qtype)
+            )
+        export = []
+        for n, (q, qsl) in enumerate (qso):
             call = q ['call']
-            qsl = self.au.get ('qsl?qso=%s&qsl_type=%s' % (q ['id'], qtype))
             qsl = qsl ['data']['collection']
             assert len (qsl) <= 1
             if not qsl:
@@ -924,10 +997,12 @@ class DB_Importer (Log_Mixin):
                         % (q ['qso_start'], call, qtype)
                         )
                     if self.args.export_adif:
-                        adif.append (self.au.qso_as_adif (q ['id']))
+                        export.append (q ['id'])
             else:
                 self.animate_info ("%s: found: %s         " % (n, call))
         if self.args.export_adif:
+            for rec in self.aau.map (self.au.qso_as_adif, export):
+                adif.append (rec)
             fn = self.args.export_adif
             with io.open (fn, 'w', encoding = self.args.encoding) as f:
                 f.write (text_type (adif))
@@ -989,6 +1064,23 @@ def main ():
         , help    = "Location name to use for local DB, default=%(default)s"
         , default = 'OE3RSU Weidling'
         )
+    cmd.add_argument \
+        ( "--cache-dir"
+        , help    = "Directory for caching responses of local DB on disk, "
+                    "default is to cache in memory only"
+        )
+    cmd.add_argument \
+        ( "--no-cache"
+        , help    = "Do not cache responses of local DB"
+        , action  = 'store_true'
+        )
+    cmd.add_argument \
+        ( "-C", "--concurrency"
+        , help    = "Number of concurrent requests to local DB, "
+                    "default=%(default)s"
+        , type    = int
+        , default = 8
+        )
     cmd.add_argument \
         ( "-d", "--cutoff-date"
         , help    = "Import no QSOs starting before that date,"
@@ -1045,6 +1137,14 @@ def main ():
         , help    = 'QSL type for some actions, allowed: '
                     '%s' % ', '.join (qsl_types)
         )
+    cmd.add_argument \
+        ( "--stats"
+        , help    = "Print statistics of requests per endpoint to stderr "
+                    "at the end, format is table (default) or json"
+        , nargs   = '?'
+        , const   = 'table'
+        , choices = ('table', 'json')
+        )
     cmd.add_argument \
         ( "-U", "--url"
         , help    = "URL of tracker (without rest path) default: %(default)s"
@@ -29,11 +29,16 @@
 
 import io
 import os
+import sys
 import requests
 from re                 import compile as rc
+from datetime           import datetime
+from functools          import lru_cache
 from argparse           import ArgumentParser
 from rsclib.autosuper   import autosuper
 from rsclib.stateparser import Parser
+from hamradio.interval  import Interval_Index, as_datetime
+from hamradio.requester import Response_Cache
 
 def prefix_sequence (seq):
     """ Generate a sequence of prefixes from certain input ranges
@@ -87,6 +92,83 @@ def prefix_sequence (seq):
     return newp
 # end def prefix_sequence
 
+re_date     = r'([A-Z][a-z]+)\s*([0-9]{1,2}),\s*([0-9]{4})'
+re_time     = r'(?:starting\s+([0-9]{4})\s+UTC\s+)?'
+re_validity = rc \
+    ( r'(?:Only contacts made|valid for this entity effective|Valid prefix)'
+      r'\s+(.*?)(?:,?\s+count for this entity|\.|$)'
+    )
+re_range    = rc (re_time + re_date + r',?\s+to\s+' + re_date)
+re_before   = rc (re_date + r',?\s+and before')
+re_after    = rc (re_time + re_date + r'(?:,?\s+(?:and|or) after|$)')
+
+def _date (month, day, year, hhmm = None, end = False):
+    # The list contains at least one non-existing date (Feb 29, 1994)
+    day = int (day)
+    while True:
+        try:
+            dt = datetime.strptime \
+                ('%s %s %s' % (month [:3], day, year), '%b %d %Y')
+            break
+        except ValueError:
+            if day <= 28:
+                raise
+            day -= 1
+    if hhmm:
+        dt = dt.replace (hour = int (hhmm [:2]), minute = int (hhmm [2:]))
+    if end:
+        dt = dt.replace (hour = 23, minute = 59, second = 59)
+    return dt
+# end def _date
+
+def parse_validity (note):
+    """ Parse the validity periods from the notes of a DXCC entity.
+        Returns a list of (start, end) tuples, start or end are None
+        for open intervals. If no period is found the entity is
+        always valid.
+    >>> def p (note):
+    ...     for s, e in parse_validity (note):
+    ...         print (s, e)
+    >>> p ('(2) Only contacts made May 4, 1967, to June 30, 1975, count '
+    ...    'for this entity.  Contacts made July 1, 1975, and after, '
+    ...    'count as Chagos Is. (VQ9).')
+    1967-05-04 00:00:00 1975-06-30 23:59:59
+    >>> p ('(E3) Only contacts made November 14, 1962, and before, or '
+    ...    'May 24, 1991, and after, count for this entity.')
+    None 1962-11-14 23:59:59
+    1991-05-24 00:00:00 None
+    >>> p ('(PJ2) Only contacts made starting 0400 UTC October 10, 2010, '
+    ...    'and after, count for this entity.')
+    2010-10-10 04:00:00 None
+    >>> p ('(E7) New prefix for Bosnia-Herzegovina effective November '
+    ...    '17, 2007.  Contacts are valid for this entity effective '
+    ...    'October 15, 1991.')
+    1991-10-15 00:00:00 None
+    >>> p ('Unofficial prefix.')
+    None None
+    """
+    note   = ' '.join (note.split ())
+    result = []
+    for m in re_validity.finditer (note):
+        clause = m.group (1)
+        for part in clause.split (', or '):
+            r = re_range.search (part)
+            if r:
+                g = r.groups ()
+                result.append ((_date (*g [1:4], hhmm = g [0]), _date \
+                    (*g [4:], end = True)))
+                continue
+            r = re_before.search (part)
+            if r:
+                result.append ((None, _date (*r.groups (), end = True)))
+            for r in re_after.finditer (part):
+                g = r.groups ()
+                result.append ((_date (*g [1:], hhmm = g [0]), None))
+    if not result:
+        result.append ((None, None))
+    return result
+# end def parse_validity
+
 
 class DXCC_Entry (autosuper):
 
@@ -99,9 +181,20 @@ class DXCC_Entry (autosuper):
         self.prefixes  = list (prefix)
         self.note      = ''
         self.org       = None
+        self.deleted   = False
+        self._validity = None
         self.__super.__init__ ()
     # end def __init__
 
+    @property
+    def validity (self):
+        """ List of (start, end) periods parsed from the notes
+        """
+        if self._validity is None:
+            self._validity = parse_validity (self.note)
+        return self._validity
+    # end def validity
+
     def add_note (self, note):
         if self.note:
             self.note += '\n' + note
@@ -177,6 +270,7 @@ class DXCC_Parser (Parser):
         self.notes     = {}
         self.lastnote  = None
         self.prf_max   = 0
+        self.notes_fixed = False
         self.__super.__init__ (*args, **kw)
     # end def __init__
 
@@ -208,6 +302,7 @@ class DXCC_Parser (Parser):
         if '_' in p:
             p, o = p.split ('_', 1)
         e = DXCC_Entry (g [5], g [1].rstrip (), g [2], g [3], g [4])
+        e.deleted = (self.entity_type == 'DELETED')
         # Same crossref can be used for several entities
         for c in cross:
             if c not in self.crossref:
@@ -224,10 +319,13 @@ class DXCC_Parser (Parser):
             p = [p]
         elif ',' in p:
             p = p.split (',')
-            # e.g., "3B6,7"
-            if len (p) == 2 and len (p [1]) == 1 and p [1].isdigit ():
-                if p [0][-1].isdigit ():
-                    p [1] = p [0][:-1] + p [1]
+            # e.g., "3B6,7", "KR6,8,JR6" or "VS9A,P,S" but not "G,GX,M"
+            for n in range (1, len (p)):
+                prev = p [n - 1]
+                if len (p [n]) != 1 or prev [-1].isdigit () != p [n].isdigit ():
+                    continue
+                if p [n].isdigit () or len (prev) > 2:
+                    p [n] = prev [:-1] + p [n]
         newp = []
         for x in p:
             if '-' in x:
@@ -259,8 +357,9 @@ class DXCC_Parser (Parser):
 
     def fix_notes (self, state, new_state, match):
         for n in self.notes:
-            for e in self.crossref [n]:
+            for e in self.crossref.get (n, []):
                 e.add_note (self.notes [n])
+        self.notes_fixed = True
     # end def fix_notes
 
     def set_entity_date (self, state, new_state, match):
@@ -290,9 +389,13 @@ class DXCC_File (autosuper):
     url  = 'http://www.arrl.org/files/file/DXCC/' + base
     file = os.path.join (os.path.dirname (__file__), 'data', base)
 
-    def __init__ (self, url = None, file = file):
+    def __init__ (self, url = None, file = file, cache = None):
+        """ The optional cache is a requester.Response_Cache used
+            for retrieving the url.
+        """
         self.url       = url
         self.file      = file
+        self.cache     = cache
         self.dxcc_list = []
         self.by_type   = {}
         if self.url is not None:
@@ -302,7 +405,10 @@ class DXCC_File (autosuper):
     def parse (self):
         h = 'ARRL DXCC LIST'
         if self.url is not None:
-            r = self.session.get (self.url)
+            if self.cache is not None:
+                r = self.cache.get (self.session, self.url)
+            else:
+                r = self.session.get (self.url)
             if not (200 <= r.status_code <= 299):
                 raise RuntimeError \
                     ( 'Invalid get result: %s: %s\n    %s'
@@ -322,6 +428,10 @@ class DXCC_File (autosuper):
             with io.StringIO (h + k) as f:
                 self.dxcc_list.append (DXCC_Parser ())
                 self.dxcc_list [-1].parse (f)
+        # The list of deleted entities has no end marker after the notes
+        for l in self.dxcc_list:
+            if not l.notes_fixed:
+                l.fix_notes (None, None, None)
         for l in self.dxcc_list:
             t = l.entity_type
             assert t not in self.by_type
@@ -330,6 +440,70 @@ class DXCC_File (autosuper):
 
 # end class DXCC_File
 
+class DXCC_History (autosuper):
+    """ Resolve a callsign and QSO date to the DXCC entities (current
+        or deleted) valid at that date. The index maps each prefix to
+        an interval index of the validity periods of the entities
+        using that prefix, it is built once for the whole DXCC file.
+        The candidates of the most recent callsigns are cached, at
+        most candidate_cache of them.
+    """
+
+    candidate_cache = 65536
+
+    def __init__ (self, dxcc_file):
+        self.index   = {}
+        self.prf_max = 0
+        for l in dxcc_file.dxcc_list:
+            for e in l.entries:
+                for prf in e.prefixes:
+                    if not prf:
+                        continue
+                    if prf not in self.index:
+                        self.index [prf] = Interval_Index ()
+                    for start, end in e.validity:
+                        self.index [prf].add (start, end, e)
+                    self.prf_max = max (self.prf_max, len (prf))
+        self._candidates = lru_cache \
+            (maxsize = self.candidate_cache) (self.candidates)
+        self.__super.__init__ ()
+    # end def __init__
+
+    def candidates (self, callsign):
+        """ Interval indexes of all matching prefixes, longest first.
+            Use the cached _candidates: In historic logs the same calls
+            appear many times.
+        """
+        c = []
+        for n in reversed (range (self.prf_max)):
+            pfx = callsign [:n+1]
+            if pfx in self.index:
+                c.append (self.index [pfx])
+        return c
+    # end def candidates
+
+    def callsign_lookup (self, callsign, date):
+        """ Return a list of entities for the longest prefix of callsign
+            that has an entity valid at date.
+        """
+        date = as_datetime (date)
+        for idx in self._candidates (callsign):
+            r = idx.lookup_all (date)
+            if r:
+                return r
+        return []
+    # end def callsign_lookup
+
+    def bulk_lookup (self, qsos):
+        """ Resolve an iterable of (callsign, date) pairs, yields the
+            entity lists in the same order.
+        """
+        for callsign, date in qsos:
+            yield self.callsign_lookup (callsign, date)
+    # end def bulk_lookup
+
+# end class DXCC_History
+
 def main ():
     cmd = ArgumentParser ()
     cmd.add_argument \
@@ -337,27 +511,90 @@ def main ():
         , help    = "Callsign to look up"
         , nargs   = '*'
         )
+    cmd.add_argument \
+        ( "--cache-dir"
+        , help    = "Directory for caching the DXCC List retrieved via "
+                    "--url, it is revalidated after a day"
+        )
+    cmd.add_argument \
+        ( "-d", "--date"
+        , help    = "Date of QSO, if given, deleted entities valid at that "
+                    "date are also found"
+        )
     cmd.add_argument \
         ( "-f", "--file"
         , help    = "File of DXCC List, default=%(default)s"
         , default = DXCC_File.file
         )
+    cmd.add_argument \
+        ( "--format"
+        , help    = "Output format of streaming mode, default=%(default)s"
+        , choices = ('tsv', 'json')
+        , default = 'tsv'
+        )
+    cmd.add_argument \
+        ( "-i", "--input"
+        , help    = "Input file with one callsign per line for streaming "
+                    "mode, default is standard input"
+        )
+    cmd.add_argument \
+        ( "-n", "--chunksize"
+        , help    = "Number of lines looked up at once in streaming mode, "
+                    "default=%(default)s"
+        , type    = int
+        , default = 100000
+        )
+    cmd.add_argument \
+        ( "-s", "--stream"
+        , help    = "Streaming mode: Read callsigns (one per line) and "
+                    "write DXCC code, entity, CQ and ITU zone and continent "
+                    "using the cty.dat prefix list"
+        , action  = 'store_true'
+        )
     cmd.add_argument \
         ( "-u", "--url"
         , help    = "URL of DXCC List, default=%(default)s"
         , default = None
         )
+    cmd.add_argument \
+        ( "-w", "--workers"
+        , help    = "Number of worker processes for streaming mode"
+        , type    = int
+        )
     args = cmd.parse_args ()
-    df   = DXCC_File (url = args.url, file = file)
+    cache = None
+    if args.cache_dir:
+        cache = Response_Cache (directory = args.cache_dir, default_ttl = 86400)
+    df   = DXCC_File (url = args.url, file = args.file, cache = cache)
     df.parse ()
+    if args.stream:
+        # Import here, hamradio.cty imports this module
+        from hamradio.cty import CTY_DXCC
+        cty = CTY_DXCC (dxcc = df)
+        f   = sys.stdin
+        if args.input:
+            f = open (args.input)
+        with f:
+            cty.stream \
+                ( f, sys.stdout
+                , format    = args.format
+                , workers   = args.workers
+                , chunksize = args.chunksize
+                )
+        return
     #for l in df.dxcc_list:
     #    #print l.entity_type
     #    if l.entity_type == 'CURRENT':
     #        for e in l.entries:
     #            print (e)
     current = df.by_type ['CURRENT']
+    if args.date:
+        history = DXCC_History (df)
     for cs in args.callsign:
-        entities = current.callsign_lookup (cs)
+        if args.date:
+            entities = history.callsign_lookup (cs, args.date)
+        else:
+            entities = current.callsign_lookup (cs)
         if not entities:
             print ("%s: NOT FOUND" % cs)
         else:
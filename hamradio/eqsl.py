@@ -29,7 +29,6 @@
 
 from __future__ import print_function
 
-import io
 import sys
 import requests
 from locale          import setlocale, LC_TIME
@@ -58,6 +57,8 @@ class EQSL_Query (requester.Requester):
     login_url       = site + 'QSLCard/'
 
     date_format = '%Y-%m-%d.%H:%M:%S'
+    # eQSL asks to limit GeteQSL.cfm to 6/Minute
+    qslcard_delay = 10
 
     def __init__ (self, nickname, username, password = None):
         self.nickname = nickname
@@ -65,7 +66,9 @@ class EQSL_Query (requester.Requester):
             (self.import_url, username, password, relax_username_check = True)
     # end def __init__
 
-    def _get_adif (self, linkpage, type = 'Outbox'):
+    def _get_adif (self, linkpage, type = 'Outbox', spool = None):
+        """ Parse ADIF while downloading, optionally copy to spool
+        """
         if 'Your ADIF log file has been built' not in linkpage:
             raise ValueError ("Error getting %s:\n%s" % (type, linkpage))
         soup = BeautifulSoup (linkpage, 'html.parser')
@@ -79,16 +82,16 @@ class EQSL_Query (requester.Requester):
         else:
             raise ValueError ("Error getting %s: ADIF url not found" % type)
         self.url = urljoin (self.base_url, href)
-        t = self.get ('', as_text = True)
-        with io.StringIO (t) as f:
+        with self.get_stream ('', spool = spool) as f:
             adif = ADIF (f)
         return adif
     # end def _get_adif
 
-    def get_qso (self, **kw):
+    def get_qso (self, spool = None, **kw):
         """ Get whole Outbox as ADIF
             'since' and other parameters are ignored, currently eQSL
             can't limit the downloaded QSOs
+            The raw ADIF is copied to the binary file spool if given.
         """
         self.url = self.out_url
         d = {}
@@ -96,12 +99,13 @@ class EQSL_Query (requester.Requester):
         d ['Password']    = self.get_pw ()
         d ['QTHNickname'] = self.nickname
         t = self.get ('?' + urlencode (d), as_text = True)
-        return self._get_adif (t)
+        return self._get_adif (t, spool = spool)
     # end def get_qso
 
-    def get_qsl (self, since = '', archived = None, **kw):
+    def get_qsl (self, since = '', archived = None, spool = None, **kw):
         """ Get Inbox as ADIF
             'since' is a datetime instance
+            The raw ADIF is copied to the binary file spool if given.
         """
         self.url = self.in_url
         d = {}
@@ -115,7 +119,7 @@ class EQSL_Query (requester.Requester):
         if archived is not None:
             d ['Archive']   = int (bool (archived))
         t = self.get ('?' + urlencode (d), as_text = True)
-        return self._get_adif (t, 'Inbox')
+        return self._get_adif (t, 'Inbox', spool = spool)
     # end def get_qsl
 
     def get_qslcard (self, rec, own_call):
@@ -132,8 +136,7 @@ class EQSL_Query (requester.Requester):
             , QSOBand      = rec.band
             , QSOMode      = rec.mode
             )
-        # eQSL asks to limit GeteQSL.cfm to 6/Minute
-        sleep (10)
+        sleep (self.qslcard_delay)
         t = self.get ('GeteQSL.cfm?' + urlencode (d), as_text = True)
         soup = BeautifulSoup (t, 'html.parser')
         self.url = self.site.rstrip ('/')
@@ -0,0 +1,186 @@
+#!/usr/bin/python3
+# Copyright (C) 2026 Dr. Ralf Schlatterbeck Open Source Consulting.
+# Reichergasse 131, A-3411 Weidling.
+# Web: http://www.runtux.com Email: office@runtux.com
+# ****************************************************************************
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS
+# IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED
+# TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A
+# PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED
+# TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ****************************************************************************
+
+from bisect   import bisect_right
+from datetime import date, datetime
+
+def as_datetime (d):
+    """ Convert a date given as datetime, date or string to a naive
+        datetime (which is interpreted as UTC). Strings can be in ISO
+        format or in ADIF format (QSO_DATE with optional TIME_ON).
+    >>> as_datetime ('20190902')
+    datetime.datetime(2019, 9, 2, 0, 0)
+    >>> as_datetime ('20190902.1857')
+    datetime.datetime(2019, 9, 2, 18, 57)
+    >>> as_datetime ('2019-09-02T18:57:00+00:00')
+    datetime.datetime(2019, 9, 2, 18, 57)
+    >>> as_datetime ('2019-09-02.18:57:30')
+    datetime.datetime(2019, 9, 2, 18, 57, 30)
+    >>> as_datetime (date (2019, 9, 2))
+    datetime.datetime(2019, 9, 2, 0, 0)
+    """
+    if isinstance (d, datetime):
+        if d.tzinfo is not None:
+            d = d.replace (tzinfo = None) - d.utcoffset ()
+        return d
+    if isinstance (d, date):
+        return datetime (d.year, d.month, d.day)
+    d = d.strip ()
+    if d [:8].isdigit ():
+        fmt = '%Y%m%d'
+        if len (d) > 13:
+            fmt = '%Y%m%d.%H%M%S'
+        elif len (d) > 8:
+            fmt = '%Y%m%d.%H%M'
+        return datetime.strptime (d, fmt)
+    if len (d) > 10 and d [10] == '.':
+        d = d [:10] + 'T' + d [11:]
+    return as_datetime (datetime.fromisoformat (d))
+# end def as_datetime
+
+class Interval_Index:
+    """ Index of date intervals with associated values.
+        Intervals are closed, start or end may be None for an open
+        interval. Lookup is by bisection over the interval starts, for
+        overlapping intervals the one with the latest start wins.
+    >>> i = Interval_Index ()
+    >>> i.add (datetime (2000, 1, 1), datetime (2000, 12, 31), 'a')
+    >>> i.add (None, datetime (1999, 12, 31), 'b')
+    >>> i.add (datetime (2005, 1, 1), None, 'c')
+    >>> i.lookup (datetime (2000, 6, 1))
+    'a'
+    >>> i.lookup (datetime (1970, 6, 1))
+    'b'
+    >>> print (i.lookup (datetime (2003, 6, 1)))
+    None
+    >>> i.lookup (datetime (2023, 6, 1))
+    'c'
+    >>> i.add (datetime (1990, 1, 1), None, 'd')
+    >>> i.lookup (datetime (2003, 6, 1))
+    'd'
+    >>> i.lookup (datetime (1970, 6, 1))
+    'b'
+    >>> len (i)
+    4
+    >>> i.lookup_all (datetime (2000, 6, 1))
+    ['a', 'd']
+    """
+
+    def __init__ (self):
+        self.intervals = []
+        self.starts    = None
+        self.max_end   = None
+    # end def __init__
+
+    def add (self, start, end, value):
+        start = datetime.min if start is None else start
+        end   = datetime.max if end   is None else end
+        self.intervals.append ((start, end, value))
+        self.starts = None
+    # end def add
+
+    def _sort (self):
+        self.intervals.sort (key = lambda x: x [:2])
+        self.starts  = [x [0] for x in self.intervals]
+        self.max_end = []
+        m = datetime.min
+        for s, e, v in self.intervals:
+            m = max (m, e)
+            self.max_end.append (m)
+    # end def _sort
+
+    def lookup (self, date):
+        """ Value of the interval containing date or None
+        """
+        if self.starts is None:
+            self._sort ()
+        idx = bisect_right (self.starts, date) - 1
+        # Walk back only as long as an earlier interval may still
+        # contain date, for non-overlapping intervals this stops at once
+        while idx >= 0 and self.max_end [idx] >= date:
+            s, e, v = self.intervals [idx]
+            if date <= e:
+                return v
+            idx -= 1
+    # end def lookup
+
+    def lookup_all (self, date):
+        """ Values of all intervals containing date, latest start first
+        """
+        if self.starts is None:
+            self._sort ()
+        r   = []
+        idx = bisect_right (self.starts, date) - 1
+        while idx >= 0 and self.max_end [idx] >= date:
+            s, e, v = self.intervals [idx]
+            if date <= e:
+                r.append (v)
+            idx -= 1
+        return r
+    # end def lookup_all
+
+    def __len__ (self):
+        return len (self.intervals)
+    # end def __len__
+
+    def __iter__ (self):
+        for s, e, v in self.intervals:
+            yield v
+    # end def __iter__
+
+# end class Interval_Index
+
+class Dated_Index:
+    """ Map keys (e.g. callsigns) to an Interval_Index
+    """
+
+    def __init__ (self):
+        self.by_key = {}
+    # end def __init__
+
+    def add (self, key, start, end, value):
+        if key not in self.by_key:
+            self.by_key [key] = Interval_Index ()
+        self.by_key [key].add (start, end, value)
+    # end def add
+
+    def lookup (self, key, date):
+        if key in self.by_key:
+            return self.by_key [key].lookup (date)
+    # end def lookup
+
+    def __contains__ (self, key):
+        return key in self.by_key
+    # end def __contains__
+
+    def __len__ (self):
+        return len (self.by_key)
+    # end def __len__
+
+# end class Dated_Index
@@ -29,7 +29,6 @@
 
 from __future__ import print_function
 
-import io
 import sys
 from argparse        import ArgumentParser
 from rsclib.pycompat import text_type
@@ -45,12 +44,16 @@ class LOTW_Query (requester.Requester):
 
     url = 'https://lotw.arrl.org/lotwuser/lotwreport.adi'
     date_format = '%Y-%m-%d.%H:%M:%S'
+    # The report is generated before the first byte is sent, this
+    # often takes minutes: No read timeout and don't repeat it.
+    timeout = (10, None)
+    retries = 0
 
     def __init__ (self, username, password = None):
         self.__super.__init__ (self.url, username, password)
     # end def __init__
 
-    def get_qso (self, since = None, **args):
+    def get_qso (self, since = None, spool = None, **args):
         """ Get QSOs for the given parameters.
             Parameters are automagically prefixed with 'qso_'
             Allowed values according to
@@ -59,7 +62,9 @@ class LOTW_Query (requester.Requester):
             enddate, endtime, mydetail, withown.
             Note that the 'since' parameter specifies the date QSO were
             uploaded to LOTW, not the startdate/starttime of the QSO.
-            We directly return an ADIF object.
+            We directly return an ADIF object, the response is parsed
+            while it is downloaded, it is copied to the binary file
+            spool if given.
         """
         d = {}
         for a in args:
@@ -70,13 +75,12 @@ class LOTW_Query (requester.Requester):
         d ['qso_query']      = 1
         if since:
             d ['qso_qsorxsince'] = since.strftime ('%Y-%m-%d')
-        t = self.get ('?' + urlencode (d), as_text = True)
-        with io.StringIO (t) as f:
+        with self.get_stream ('?' + urlencode (d), spool = spool) as f:
             adif = ADIF (f)
         return adif
     # end def get_qso
 
-    def get_qsl (self, since = None, **args):
+    def get_qsl (self, since = None, spool = None, **args):
         """ Get QSLs for the given parameters.
             Parameters are automagically prefixed with 'qso_'
             according the the lotw API.
@@ -86,7 +90,9 @@ class LOTW_Query (requester.Requester):
             enddate, endtime, mydetail, withown.
             Note that the 'since' parameter specifies the date QSL were
             uploaded to LOTW, not the startdate/starttime of the QSO.
-            We directly return an ADIF object.
+            We directly return an ADIF object, the response is parsed
+            while it is downloaded, it is copied to the binary file
+            spool if given.
         """
         d = {}
         for a in args:
@@ -98,8 +104,7 @@ class LOTW_Query (requester.Requester):
         if since:
             d ['qso_qslsince'] = since.strftime ('%Y-%m-%d')
         d ['qso_qsldetail']  = 'yes'
-        t = self.get ('?' + urlencode (d), as_text = True)
-        with io.StringIO (t) as f:
+        with self.get_stream ('?' + urlencode (d), spool = spool) as f:
             adif = ADIF (f)
         return adif
     # end def get_qsl
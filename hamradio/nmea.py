@@ -0,0 +1,214 @@
+#!/usr/bin/python3
+# Copyright (C) 2026 Dr. Ralf Schlatterbeck Open Source Consulting.
+# Reichergasse 131, A-3411 Weidling.
+# Web: http://www.runtux.com Email: office@runtux.com
+# ****************************************************************************
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS
+# IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED
+# TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A
+# PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED
+# TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ****************************************************************************
+
+""" Read an NMEA 0183 stream of a GPS receiver and report changes of the
+    Maidenhead locator, e.g. for rover or mobile operation.
+"""
+
+import sys
+from argparse     import ArgumentParser
+from functools    import reduce
+from hamradio.qth import Maidenhead_Locator
+
+def nmea_checksum (body):
+    """ Checksum of the part between '$' and '*'
+    >>> s = 'GPGGA,123519,4807.038,N,01131.000,E,1,08,0.9,545.4,M,46.9,M,,'
+    >>> '%02X' % nmea_checksum (s)
+    '47'
+    """
+    return reduce (lambda a, b: a ^ b, body.encode ('ascii'), 0)
+# end def nmea_checksum
+
+def _coordinate (value, hemisphere, degree_digits):
+    deg = float (value [:degree_digits]) + float (value [degree_digits:]) / 60.
+    if hemisphere in ('S', 'W'):
+        deg = -deg
+    return deg
+# end def _coordinate
+
+def parse_nmea (line):
+    """ Parse a GGA or RMC sentence (from any talker), return the tuple
+        (time, lat, lon) or None if the sentence has no valid fix, a
+        wrong checksum or is of another type. The time is the UTC time
+        string hhmmss(.ss) of the fix.
+    >>> gga = '$GPGGA,123519,4807.038,N,01131.000,E,%s,08,0.9,545.4,M,'
+    >>> gga += '46.9,M,,*%s'
+    >>> parse_nmea (gga % (1, '47'))
+    ('123519', 48.1173, 11.516666666666667)
+    >>> rmc = '$GNRMC,123519,A,4807.038,S,01131.000,W,022.4,084.4,230394,,W*%s'
+    >>> parse_nmea (rmc % '57')
+    ('123519', -48.1173, -11.516666666666667)
+    >>> parse_nmea (gga % (0, '46'))
+    >>> parse_nmea (gga % (1, '48'))
+    """
+    line = line.strip ()
+    if not line.startswith ('$'):
+        return None
+    body, sep, cs = line [1:].partition ('*')
+    if sep:
+        try:
+            if int (cs [:2], 16) != nmea_checksum (body):
+                return None
+        except ValueError:
+            return None
+    f = body.split (',')
+    kind = f [0][2:]
+    try:
+        if kind == 'GGA':
+            if len (f) < 7 or f [6] in ('', '0'):
+                return None
+            t, lat, ns, lon, ew = f [1:6]
+        elif kind == 'RMC':
+            if len (f) < 7 or f [2] != 'A':
+                return None
+            t = f [1]
+            lat, ns, lon, ew = f [3:7]
+        else:
+            return None
+        return t, _coordinate (lat, ns, 2), _coordinate (lon, ew, 3)
+    except ValueError:
+        return None
+# end def parse_nmea
+
+class Locator_Tracker:
+    """ Keep track of the current locator at the given precision (number
+        of pairs). The box of the current square is kept, a new position
+        inside the box is recognized with four comparisons, only when
+        leaving the box the new locator is computed.
+    >>> t = Locator_Tracker (3)
+    >>> t.update (48.2085, 16.3731)
+    'JN88EF'
+    >>> t.update (48.2090, 16.3740)
+    >>> t.update (48.1990, 16.3740)
+    'JN88EE'
+    >>> print ('%.6f %.6f %.6f %.6f' % t.box)
+    48.166667 48.208333 16.333333 16.416667
+    >>> t = Locator_Tracker (2)
+    >>> t.update (48.2085, 16.3731)
+    'JN88'
+    >>> t.update (48.9, 17.9)
+    >>> print ('%.6f %.6f %.6f %.6f' % t.box)
+    48.000000 49.000000 16.000000 18.000000
+    >>> t = Locator_Tracker (4)
+    >>> t.update (48.2085, 16.3731)
+    'JN88EF40'
+    >>> print ('%.6f %.6f %.6f %.6f' % t.box)
+    48.208333 48.212500 16.366667 16.375000
+    """
+
+    epsilon = 1e-9
+
+    def __init__ (self, precision = 3):
+        self.precision = precision
+        self.locator   = None
+        self.box       = None
+        # Size in degrees (lon, lat) of a square at given precision
+        lon = 20.
+        for k in range (1, precision):
+            lon /= 10. if k % 2 else 24.
+        self.size = (lon, lon / 2.)
+    # end def __init__
+
+    def update (self, lat, lon):
+        """ Return the new locator if the position is in another square
+            than the last one, None otherwise
+        """
+        if self.box is not None:
+            lat0, lat1, lon0, lon1 = self.box
+            if lat0 <= lat < lat1 and lon0 <= lon < lon1:
+                return None
+        loc = Maidenhead_Locator (lat, lon).as_locator (self.precision)
+        ctr = Maidenhead_Locator.from_locator (loc, round_vhf = False)
+        # The box is made slightly smaller than the square: Positions
+        # very near the border are always computed with as_locator,
+        # rounding errors can't make us miss a change of the locator.
+        dlon, dlat = (s / 2. - self.epsilon for s in self.size)
+        self.box = \
+            (ctr.lat - dlat, ctr.lat + dlat, ctr.lon - dlon, ctr.lon + dlon)
+        if loc == self.locator:
+            return None
+        self.locator = loc
+        return loc
+    # end def update
+
+# end class Locator_Tracker
+
+class NMEA_Reader:
+    """ Read NMEA sentences from a file object (a file, pipe or serial
+        device opened as a file) and yield (locator, time, lat, lon)
+        whenever the locator at the given precision changes.
+    """
+
+    def __init__ (self, fd, precision = 3):
+        self.fd      = fd
+        self.tracker = Locator_Tracker (precision)
+    # end def __init__
+
+    def __iter__ (self):
+        update = self.tracker.update
+        for line in self.fd:
+            if isinstance (line, bytes):
+                line = line.decode ('ascii', 'replace')
+            fix = parse_nmea (line)
+            if fix is None:
+                continue
+            t, lat, lon = fix
+            loc = update (lat, lon)
+            if loc is not None:
+                yield loc, t, lat, lon
+    # end def __iter__
+
+# end class NMEA_Reader
+
+def main ():
+    cmd = ArgumentParser ()
+    cmd.add_argument \
+        ( "device"
+        , help    = "File or device to read NMEA sentences from, "
+                    "default is standard input"
+        , nargs   = '?'
+        )
+    cmd.add_argument \
+        ( "-p", "--precision"
+        , help    = "Number of locator pairs, default=%(default)s"
+        , type    = int
+        , default = 3
+        )
+    args = cmd.parse_args ()
+    f    = sys.stdin
+    if args.device:
+        f = open (args.device, 'r', errors = 'replace')
+    with f:
+        for loc, t, lat, lon in NMEA_Reader (f, args.precision):
+            print ("%s %s %.6f %.6f" % (t, loc, lat, lon))
+            sys.stdout.flush ()
+# end def main
+
+if __name__ == '__main__':
+    main ()
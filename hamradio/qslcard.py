@@ -76,8 +76,7 @@ class QSL_Exporter (requester.Requester):
             ]
         d ['@fields'] = ','.join (fields)
         d ['@sort'] = 'qso.owner.name,qso.call,qso.qso_start'
-        r = self.get ('qsl?' + urlencode (d)) ['data']['collection']
-        for k in r:
+        for k in self.iter_collection ('qsl?' + urlencode (d)):
             yield (k)
     # end def qsl_iter
 
@@ -162,7 +161,9 @@ class QSL_Exporter (requester.Requester):
     # end def as_tex
 
     def set_sent_date (self):
-        for qsl in self.qsl_iter ():
+        # Setting date_sent removes the qsl from the query: Retrieve
+        # all pages first
+        for qsl in list (self.qsl_iter ()):
             # Get the qsl again to get etag
             q = self.get ('qsl/%s' % qsl ['id'])
             etag = q ['data']['@etag']
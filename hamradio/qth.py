@@ -27,7 +27,122 @@
 # SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 # ****************************************************************************
 
+import math
+from functools           import lru_cache
 from rsclib.iter_recipes import grouper
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Mean earth radius in km
+earth_radius = 6371.0
+
+def great_circle (lat1, lon1, lat2, lon2):
+    """ Great circle distance in km and initial bearing in degrees from
+        the first to the second position.
+    >>> d, b = great_circle (48.2, 16.37, 51.5, -0.12)
+    >>> print ("%.1f %.1f" % (d, b))
+    1234.8 293.5
+    """
+    lat1, lon1, lat2, lon2 = map (math.radians, (lat1, lon1, lat2, lon2))
+    dlon = lon2 - lon1
+    a = ( math.sin ((lat2 - lat1) / 2) ** 2
+        + math.cos (lat1) * math.cos (lat2) * math.sin (dlon / 2) ** 2
+        )
+    d = 2 * earth_radius * math.asin (min (1.0, math.sqrt (a)))
+    b = math.atan2 \
+        ( math.sin (dlon) * math.cos (lat2)
+        , math.cos (lat1) * math.sin (lat2)
+        - math.sin (lat1) * math.cos (lat2) * math.cos (dlon)
+        )
+    return d, math.degrees (b) % 360
+# end def great_circle
+
+def batch_great_circle (lat1, lon1, lat2, lon2):
+    """ Vectorised great_circle for numpy arrays (or scalars mixed with
+        arrays), returns arrays of distance and bearing.
+    """
+    if np is None:
+        raise ImportError ("Batch computation needs numpy")
+    lat1, lon1, lat2, lon2 = \
+        (np.radians (np.asarray (x, dtype = float))
+         for x in (lat1, lon1, lat2, lon2)
+        )
+    dlon = lon2 - lon1
+    a = ( np.sin ((lat2 - lat1) / 2) ** 2
+        + np.cos (lat1) * np.cos (lat2) * np.sin (dlon / 2) ** 2
+        )
+    d = 2 * earth_radius * np.arcsin (np.minimum (1.0, np.sqrt (a)))
+    b = np.arctan2 \
+        ( np.sin (dlon) * np.cos (lat2)
+        , np.cos (lat1) * np.sin (lat2)
+        - np.sin (lat1) * np.cos (lat2) * np.cos (dlon)
+        )
+    return d, np.degrees (b) % 360
+# end def batch_great_circle
+
+def locator_range (c):
+    """ Range of valid (upper case) characters at position c of a
+        locator: Letter pairs are A-R (first) or A-X, then digit pairs.
+    """
+    if (c // 2) % 2:
+        return '0', '9'
+    return 'A', 'R' if c < 2 else 'X'
+# end def locator_range
+
+def valid_locator (loc):
+    """ Check an upper case locator
+    >>> [valid_locator (l) for l in ('JN88EF40', 'ZZ00', 'JNA8', 'JN8Z')]
+    [True, False, False, False]
+    """
+    if not loc or len (loc) % 2:
+        return False
+    for c, k in enumerate (loc):
+        lo, hi = locator_range (c)
+        if not lo <= k <= hi:
+            return False
+    return True
+# end def valid_locator
+
+@lru_cache (maxsize = 4096)
+def _locator_position (loc, round_vhf):
+    l = Maidenhead_Locator.from_locator (loc, round_vhf)
+    return l.lat, l.lon
+# end def _locator_position
+
+def locator_position (loc, round_vhf = True):
+    """ Centre (lat, lon) of a locator, memoised since the same locators
+        occur again and again in a log. Returns None for invalid
+        locators.
+    >>> print ("(%2.5f, %2.5f)" % locator_position ('jn88ef40'))
+    (48.21032, 16.37064)
+    >>> [locator_position (l) for l in ('JN8', 'ZZ00', 'JNA8', 'JN8Z', '')]
+    [None, None, None, None, None]
+    """
+    loc = (loc or '').strip ().upper ()
+    if not valid_locator (loc):
+        return None
+    return _locator_position (loc, round_vhf)
+# end def locator_position
+
+def adif_distances (adif, home = None, round_vhf = True):
+    """ Distance (km) and beam heading for each record of an ADIF log
+        from MY_GRIDSQUARE (or the home locator given, if a record has
+        none) to GRIDSQUARE. Returns two numpy arrays, NaN for records
+        without valid locators.
+    """
+    if np is None:
+        raise ImportError ("Batch computation needs numpy")
+    pos = np.full ((len (adif.records), 4), np.nan)
+    for n, r in enumerate (adif.records):
+        mine  = locator_position \
+            (getattr (r, 'my_gridsquare', None) or home, round_vhf)
+        other = locator_position (getattr (r, 'gridsquare', None), round_vhf)
+        if mine and other:
+            pos [n] = mine + other
+    return batch_great_circle (pos [:, 0], pos [:, 1], pos [:, 2], pos [:, 3])
+# end def adif_distances
 
 class Maidenhead_Locator (object):
     """ Represent a location with LAT/LON as Maidenhead Locator
@@ -86,16 +201,16 @@ class Maidenhead_Locator (object):
         pos = ((self.lon + 180.) / 2., self.lat + 90.)
         div = 10
         for k in range (precision):
-            np = []
+            npos = []
             for p in pos:
                 q, r = divmod (p, div)
                 if k % 2:
                     loc.append (str (int (q)))
-                    np.append (r * 10)
+                    npos.append (r * 10)
                 else:
                     loc.append (chr (ord ('A') + int (q)))
-                    np.append (r * 24)
-            pos = np
+                    npos.append (r * 24)
+            pos = npos
             if k % 2:
                 div = 10
             else:
@@ -135,6 +250,136 @@ class Maidenhead_Locator (object):
         return cls (lon = pos [0] * 2 - 180, lat = pos [1] - 90)
     # end def from_locator
 
+    @staticmethod
+    def batch_as_locator (lat, lon, precision = 3):
+        """ Vectorised as_locator for numpy arrays of lat/lon, returns
+            an array of locator strings with precision pairs. Positions
+            with NaN (e.g. from batch_from_locator) result in ''.
+        >>> cls = Maidenhead_Locator
+        >>> cls.batch_as_locator ([48.208525, -34.0], [16.373146, 18.5], 4)
+        array(['JN88EF40', 'JF96GA00'], dtype='<U8')
+        >>> cls.batch_as_locator ([48.208525, np.nan], [16.373146, 18.5])
+        array(['JN88EF', ''], dtype='<U6')
+        >>> cls.batch_as_locator (48.208525, 16.373146)
+        array(['JN88EF'], dtype='<U6')
+        """
+        if np is None:
+            raise ImportError ("Batch conversion needs numpy")
+        lat = np.atleast_1d (np.asarray (lat, dtype = float))
+        lon = np.atleast_1d (np.asarray (lon, dtype = float))
+        bad = np.isnan (lat) | np.isnan (lon)
+        if bad.any ():
+            lat = np.where (bad, 0., lat)
+            lon = np.where (bad, 0., lon)
+        pos = [(lon + 180.) / 2., lat + 90.]
+        loc = np.empty ((len (lat), 2 * precision), dtype = np.uint8)
+        div = 10
+        for k in range (precision):
+            for n, p in enumerate (pos):
+                q, r = np.divmod (p, div)
+                if k % 2:
+                    loc [:, 2 * k + n] = ord ('0') + q
+                    pos [n] = r * 10
+                else:
+                    loc [:, 2 * k + n] = ord ('A') + q
+                    pos [n] = r * 24
+            if k % 2:
+                div = 10
+            else:
+                div = 24
+        loc = loc.view ('S%d' % (2 * precision)).reshape (-1)
+        loc = loc.astype ('U%d' % (2 * precision))
+        loc [bad] = ''
+        return loc
+    # end def batch_as_locator
+
+    @staticmethod
+    def batch_from_locator (locators, round_vhf = True):
+        """ Vectorised from_locator, returns numpy arrays of lat and lon
+            of the locators, these may have different lengths.
+            Empty or invalid locators (e.g. an empty gridsquare of an
+            ADIF record) result in NaN.
+        >>> cls = Maidenhead_Locator
+        >>> lat, lon = cls.batch_from_locator (['JN88ef40', 'JN88', 'JF96FA'])
+        >>> print (' '.join ('(%2.5f, %2.5f)' % p for p in zip (lat, lon)))
+        (48.21032, 16.37064) (48.47699, 16.95398) (-33.98013, 18.45642)
+        >>> cls.batch_as_locator (lat, lon, 4)
+        array(['JN88EF40', 'JN88LL44', 'JF96FA44'], dtype='<U8')
+        >>> locs = ['JN88', '', 'JN8', 'ZZ00', 'JNA8', 'JN88ez', 'Jö88']
+        >>> lat, lon = cls.batch_from_locator (locs)
+        >>> print (' '.join ('%2.5f' % x for x in lat))
+        48.47699 nan nan nan nan nan nan
+        """
+        if np is None:
+            raise ImportError ("Batch conversion needs numpy")
+        rounding_constant = 0.47699
+        if not round_vhf:
+            rounding_constant = .5
+        locs = np.char.upper (np.asarray (locators, dtype = str))
+        lat  = np.full (len (locs), np.nan)
+        lon  = np.full (len (locs), np.nan)
+        lens = np.char.str_len (locs)
+        code = locs.view (np.uint32).reshape (len (locs), locs.itemsize // 4)
+        for l in np.unique (lens):
+            if not l or l % 2:
+                continue
+            idx   = np.flatnonzero (lens == l)
+            chars = code [idx, :l].astype (float)
+            valid = np.ones (len (idx), dtype = bool)
+            for c in range (l):
+                lo, hi = (ord (k) for k in locator_range (c))
+                valid &= (chars [:, c] >= lo) & (chars [:, c] <= hi)
+            idx   = idx   [valid]
+            chars = chars [valid]
+            chars = np.where \
+                (chars <= ord ('9'), chars - ord ('0'), chars - ord ('A'))
+            pos = [np.zeros (len (idx)), np.zeros (len (idx))]
+            mul = 10
+            for n in range (l // 2):
+                for k in range (2):
+                    pos [k] += chars [:, 2 * n + k] * mul
+                if n % 2:
+                    newmul = 24
+                else:
+                    newmul = 10
+                mul = mul / newmul
+            for k in range (2):
+                pos [k] += mul * newmul * rounding_constant
+            lon [idx] = pos [0] * 2 - 180
+            lat [idx] = pos [1] - 90
+        return lat, lon
+    # end def batch_from_locator
+
+    def distance_bearing (self, other):
+        """ Great circle distance in km and beam heading to other, a
+            Maidenhead_Locator or a locator string
+        >>> cls = Maidenhead_Locator
+        >>> d, b = cls.from_locator ('JN88ef').distance_bearing ('IO91wm')
+        >>> print ("%.1f %.1f" % (d, b))
+        1234.7 293.4
+        >>> cls.from_locator ('JN88ef').distance_bearing ('ZZ00')
+        Traceback (most recent call last):
+        ...
+        ValueError: Invalid locator: 'ZZ00'
+        """
+        if not isinstance (other, Maidenhead_Locator):
+            pos = locator_position (other)
+            if pos is None:
+                raise ValueError ("Invalid locator: %r" % other)
+            lat, lon = pos
+        else:
+            lat, lon = other.lat, other.lon
+        return great_circle (self.lat, self.lon, lat, lon)
+    # end def distance_bearing
+
+    def distance (self, other):
+        return self.distance_bearing (other) [0]
+    # end def distance
+
+    def bearing (self, other):
+        return self.distance_bearing (other) [1]
+    # end def bearing
+
     def _format (self, value, suffices):
         r      = []
         suffix = suffices [value > 0]
@@ -162,3 +407,137 @@ class Maidenhead_Locator (object):
     __repr__ = __str__
 
 # end class Maidenhead_Locator
+
+class Station_Index:
+    """ Spatial index of stations for radius and nearest neighbour
+        queries. Stations are kept in buckets of cell x cell degrees, a
+        query only examines the buckets overlapping the bounding box of
+        the searched circle. Stations can be added at any time.
+    >>> idx = Station_Index ()
+    >>> for call, loc in ( ('OE3RSU', 'JN88ef'), ('OK1AB', 'JN79us')
+    ...                  , ('G4ABC', 'IO91wm'), ('VK2XY', 'QF56od')
+    ...                  , ('OE1XYZ', 'JN88ee')
+    ...                  ):
+    ...     idx.add_locator (call, loc)
+    >>> for d, call, lat, lon in idx.radius ('JN88ef', 300):
+    ...     print ("%s %.1f" % (call, d))
+    OE3RSU 0.0
+    OE1XYZ 4.6
+    OK1AB 178.2
+    >>> [call for d, call, lat, lon in idx.nearest ('IO91', 2)]
+    ['G4ABC', 'OK1AB']
+    >>> len (idx)
+    5
+    """
+
+    def __init__ (self, cell = 1.0):
+        self.cell    = cell
+        self.ncols   = int (round (360. / cell))
+        self.buckets = {}
+        self.count   = 0
+    # end def __init__
+
+    def __len__ (self):
+        return self.count
+    # end def __len__
+
+    def _bucket (self, lat, lon):
+        col = int ((lon + 180.) // self.cell) % self.ncols
+        return (int (lat // self.cell), col)
+    # end def _bucket
+
+    @staticmethod
+    def _position (lat, lon):
+        if lon is None:
+            pos = locator_position (lat)
+            if pos is None:
+                raise ValueError ("Invalid locator: %s" % lat)
+            return pos
+        return lat, lon
+    # end def _position
+
+    def add (self, key, lat, lon):
+        """ Add station key at position lat, lon
+        """
+        b = self._bucket (lat, lon)
+        self.buckets.setdefault (b, []).append ((key, lat, lon))
+        self.count += 1
+    # end def add
+
+    def add_locator (self, key, locator):
+        """ Add station with the centre of the given locator
+        """
+        self.add (key, *self._position (locator, None))
+    # end def add_locator
+
+    @classmethod
+    def from_adif (cls, adif, cell = 1.0):
+        """ Index of the stations of an ADIF log with the callsign as
+            key, records without a valid GRIDSQUARE are skipped.
+        """
+        idx = cls (cell)
+        for r in adif.records:
+            pos = locator_position (getattr (r, 'gridsquare', None))
+            if pos is not None:
+                idx.add (r.call, *pos)
+        return idx
+    # end def from_adif
+
+    def _cells (self, lat, lon, km):
+        """ Buckets overlapping the bounding box of the circle
+        """
+        delta = math.degrees (km / earth_radius)
+        lat0  = int ((lat - delta) // self.cell)
+        lat1  = int ((lat + delta) // self.cell)
+        if abs (lat) + delta >= 90 or delta >= 90:
+            cols = range (self.ncols)
+        else:
+            dlon = math.degrees \
+                ( math.asin
+                    ( min (1.0, math.sin (math.radians (delta))
+                    / math.cos (math.radians (lat)))
+                    )
+                )
+            col0 = int ((lon - dlon + 180.) // self.cell)
+            col1 = int ((lon + dlon + 180.) // self.cell)
+            if col1 - col0 + 1 >= self.ncols:
+                cols = range (self.ncols)
+            else:
+                cols = [c % self.ncols for c in range (col0, col1 + 1)]
+        for row in range (lat0, lat1 + 1):
+            for col in cols:
+                if (row, col) in self.buckets:
+                    yield self.buckets [(row, col)]
+    # end def _cells
+
+    def radius (self, lat, km, lon = None):
+        """ Stations within km of the position (lat/lon or a locator
+            given as lat), returns a list of (distance, key, lat, lon)
+            sorted by distance.
+        """
+        lat, lon = self._position (lat, lon)
+        result   = []
+        for bucket in self._cells (lat, lon, km):
+            for key, la, lo in bucket:
+                d = great_circle (lat, lon, la, lo) [0]
+                if d <= km:
+                    result.append ((d, key, la, lo))
+        result.sort (key = lambda x: x [0])
+        return result
+    # end def radius
+
+    def nearest (self, lat, k = 1, lon = None):
+        """ The k nearest stations to the position (lat/lon or a
+            locator given as lat), same result format as radius.
+            The search radius is doubled until k stations are found.
+        """
+        lat, lon = self._position (lat, lon)
+        km = earth_radius * math.radians (self.cell)
+        while True:
+            result = self.radius (lat, km, lon)
+            if len (result) >= k or km >= math.pi * earth_radius:
+                return result [:k]
+            km *= 2
+    # end def nearest
+
+# end class Station_Index
@@ -29,19 +29,644 @@
 
 from __future__ import print_function
 
+import io
+import os
+import json
+import time
+import base64
+import asyncio
+import hashlib
 import requests
+from re          import compile as rc
+from threading   import Lock
+from collections import OrderedDict, Counter, deque
+from functools import partial
 from netrc    import netrc
 from getpass  import getpass
+from requests.adapters  import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor, Future
 try:
-    from urllib.parse import urlparse
+    from urllib.parse import urlparse, urlencode, unquote
 except ImportError:
     from urlparse import urlparse
+    from urllib   import urlencode, unquote
 from rsclib.autosuper import autosuper
 
+class Response_Cache (autosuper):
+    """ Cache for GET responses: An in-memory LRU of at most maxsize
+        entries, optionally backed by a directory on disk. The ttl is
+        a dictionary of regular expressions (searched in the URL) to
+        the time in seconds a response is used without asking the
+        server, the first matching pattern wins, otherwise default_ttl
+        applies. After that the entry is revalidated with
+        If-None-Match (and If-Modified-Since) using the ETag (and
+        Last-Modified) header of the cached response, a 304 answer
+        renews the entry. Only responses that carry a validator or
+        have a ttl are stored. Our own PUT/POST to a resource
+        invalidates the resource, its collection and its items, see
+        invalidate, this includes entries in the disk store written
+        by an earlier run.
+    """
+
+    def __init__ \
+        (self, maxsize = 256, directory = None, ttl = {}, default_ttl = 0):
+        self.maxsize     = maxsize
+        self.directory   = directory
+        self.ttl         = [(rc (k), v) for k, v in ttl.items ()]
+        self.default_ttl = default_ttl
+        self.entries     = OrderedDict ()
+        self.lock        = Lock ()
+        self.hits        = 0
+        self.revalidated = 0
+        self.misses      = 0
+        if directory and not os.path.isdir (directory):
+            os.makedirs (directory)
+    # end def __init__
+
+    @staticmethod
+    def path (url):
+        return url.split ('?', 1) [0].rstrip ('/')
+    # end def path
+
+    def key (self, url, session):
+        """ Responses depend on the authenticated user """
+        auth = session.auth
+        if isinstance (auth, tuple):
+            auth = auth [0]
+        return '%s %s' % (auth or '', url)
+    # end def key
+
+    @staticmethod
+    def ancestors (path):
+        """ The path and all its parents up to the server
+        >>> list (Response_Cache.ancestors ('https://x.org/data/qsl'))
+        ['https://x.org/data/qsl', 'https://x.org/data', 'https://x.org']
+        """
+        while '//' in path:
+            yield path
+            path = path.rsplit ('/', 1) [0]
+    # end def ancestors
+
+    def filename (self, key):
+        h = hashlib.sha256 (key.encode ('utf-8')).hexdigest ()
+        return os.path.join (self.directory, h + '.json')
+    # end def filename
+
+    def marker (self, kind, path):
+        """ Time of the last invalidation of path in the disk store,
+            kind is 'resource' (the path with any query) or 'tree'
+            (the path and everything below it).
+        """
+        try:
+            with open (self.filename ('%s %s' % (kind, path))) as f:
+                return json.load (f) ['time']
+        except (IOError, ValueError, KeyError):
+            return None
+    # end def marker
+
+    def set_marker (self, kind, path, t):
+        fn  = self.filename ('%s %s' % (kind, path))
+        tmp = fn + '.%s' % os.getpid ()
+        with open (tmp, 'w') as f:
+            json.dump (dict (time = t), f)
+        os.replace (tmp, fn)
+    # end def set_marker
+
+    def is_invalid (self, entry):
+        """ Check if a disk entry was stored before an invalidation """
+        stored = entry.get ('stored', 0)
+        q      = self.path (entry ['url'])
+        t      = self.marker ('resource', q)
+        if t is not None and t >= stored:
+            return True
+        for p in self.ancestors (q):
+            t = self.marker ('tree', p)
+            if t is not None and t >= stored:
+                return True
+        return False
+    # end def is_invalid
+
+    def lookup (self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end (key)
+                return self.entries [key]
+        if not self.directory:
+            return None
+        try:
+            with open (self.filename (key)) as f:
+                entry = json.load (f)
+        except (IOError, ValueError):
+            return None
+        if entry ['key'] != key:
+            return None
+        if self.is_invalid (entry):
+            with self.lock:
+                self.remove (key)
+            return None
+        self.store (entry, disk = False)
+        return entry
+    # end def lookup
+
+    def store (self, entry, disk = True):
+        with self.lock:
+            self.entries [entry ['key']] = entry
+            self.entries.move_to_end (entry ['key'])
+            while len (self.entries) > self.maxsize:
+                self.entries.popitem (last = False)
+        if disk and self.directory:
+            fn  = self.filename (entry ['key'])
+            tmp = fn + '.%s' % os.getpid ()
+            with open (tmp, 'w') as f:
+                json.dump (entry, f)
+            os.replace (tmp, fn)
+    # end def store
+
+    def remove (self, key):
+        self.entries.pop (key, None)
+        if self.directory:
+            try:
+                os.unlink (self.filename (key))
+            except OSError:
+                pass
+    # end def remove
+
+    def invalidate (self, url):
+        """ Invalidate all entries for the resource at url (ignoring
+            a query), entries below it (items of a collection) and
+            entries above it (the collection of an item including
+            queries on the collection).
+            Entries in the disk store that are not in memory are
+            not known by key: We record the time of the invalidation
+            for the path and its parents, disk entries stored before
+            are dropped when they are loaded, see is_invalid.
+        """
+        p = self.path (url)
+        with self.lock:
+            for key in list (self.entries):
+                q = self.path (self.entries [key]['url'])
+                if q == p or q.startswith (p + '/') or p.startswith (q + '/'):
+                    self.remove (key)
+            if self.directory:
+                now = time.time ()
+                self.set_marker ('tree', p, now)
+                for q in self.ancestors (p):
+                    if q != p:
+                        self.set_marker ('resource', q, now)
+    # end def invalidate
+
+    def clear (self):
+        with self.lock:
+            for key in list (self.entries):
+                self.remove (key)
+    # end def clear
+
+    def ttl_for (self, url):
+        for pattern, ttl in self.ttl:
+            if pattern.search (url):
+                return ttl
+        return self.default_ttl
+    # end def ttl_for
+
+    def response (self, entry, cache_status = 'hit'):
+        """ Build a new response object from a cache entry, callers
+            may modify the result of json () so we never share it.
+            The cache_status is 'hit' or 'revalidated'.
+        """
+        r = requests.Response ()
+        r.cache_status = cache_status
+        r.status_code = entry ['status']
+        r.reason      = entry ['reason']
+        r.url         = entry ['url']
+        r.encoding    = entry ['encoding']
+        r._content    = base64.b64decode (entry ['content'])
+        r.headers.update (entry ['headers'])
+        return r
+    # end def response
+
+    def get (self, session, url, headers = None, **kw):
+        """ Conditional GET via session, returns a response object.
+            Requests with parameters not encoded in the URL are not
+            cached.
+        """
+        if kw.get ('params') or kw.get ('stream'):
+            return session.get (url, headers = headers, **kw)
+        key   = self.key (url, session)
+        now   = time.time ()
+        entry = self.lookup (key)
+        if entry and now < entry ['expires']:
+            self.hits += 1
+            return self.response (entry)
+        h = dict (headers or {})
+        if entry and entry ['etag']:
+            h ['If-None-Match'] = entry ['etag']
+        if entry and entry ['last_modified']:
+            h ['If-Modified-Since'] = entry ['last_modified']
+        r   = session.get (url, headers = h, **kw)
+        ttl = self.ttl_for (url)
+        if r.status_code == 304 and entry:
+            self.revalidated += 1
+            entry ['expires'] = now + ttl
+            entry ['stored']  = now
+            self.store (entry)
+            return self.response (entry, 'revalidated')
+        self.misses += 1
+        if not (200 <= r.status_code <= 299):
+            return r
+        etag = r.headers.get ('ETag')
+        lm   = r.headers.get ('Last-Modified')
+        cc   = r.headers.get ('Cache-Control', '')
+        if (etag or lm or ttl) and 'no-store' not in cc:
+            entry = dict \
+                ( key           = key
+                , url           = url
+                , etag          = etag
+                , last_modified = lm
+                , expires       = now + ttl
+                , stored        = now
+                , status        = r.status_code
+                , reason        = r.reason
+                , encoding      = r.encoding
+                , headers       = dict (r.headers)
+                , content       = base64.b64encode (r.content).decode ('ascii')
+                )
+            self.store (entry)
+        elif entry:
+            with self.lock:
+                self.remove (key)
+        return r
+    # end def get
+
+# end class Response_Cache
+
+class Request_Stats (autosuper):
+    """ Instrumentation for a Requester: Requests are grouped by
+        method and endpoint template (numeric path components are
+        replaced by <id>, only the names of query parameters are
+        kept). For each template we count requests, record a latency
+        histogram, bytes received and sent and the status codes.
+        Responses from the cache are counted with status 'cache',
+        revalidated entries with 304, exceptions with their class name.
+        Bytes are those transferred over the network, the body of a
+        response from the cache is not counted.
+        Each tracer in tracers is called with the method, template,
+        url, status, elapsed time in seconds and bytes received for
+        every request.
+    """
+
+    buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+    id_re   = rc (r'^[0-9]+$')
+
+    def __init__ (self, tracers = ()):
+        self.tracers   = list (tracers)
+        self.endpoints = {}
+        self.lock      = Lock ()
+    # end def __init__
+
+    @classmethod
+    def template (cls, method, url):
+        """ Endpoint template of url
+        >>> Request_Stats.template ('get', 'qsl?qso=17&qsl_type=LOTW')
+        'GET qsl?qsl_type&qso'
+        >>> Request_Stats.template ('get', 'qso?%40page_size=5&%40page_index=2')
+        'GET qso?@page_index&@page_size'
+        >>> Request_Stats.template ('put', 'http://x/rest/data/qso/4711')
+        'PUT http://x/rest/data/qso/<id>'
+        """
+        path, _, query = url.partition ('?')
+        path = '/'.join \
+            ('<id>' if cls.id_re.match (p) else p for p in path.split ('/'))
+        if query:
+            names = sorted \
+                ( set
+                    ( unquote (q.split ('=', 1) [0])
+                      for q in query.split ('&') if q
+                    )
+                )
+            path += '?' + '&'.join (names)
+        return ' '.join ((method.upper (), path))
+    # end def template
+
+    def record (self, method, url, elapsed, r = None, exc = None):
+        if r is not None:
+            status = getattr (r, 'cache_status', None)
+            if status == 'hit':
+                status = 'cache'
+            elif status == 'revalidated':
+                status = 304
+            else:
+                status = r.status_code
+            # Don't consume a streamed response
+            if status in ('cache', 304):
+                nbytes = 0
+            elif r._content_consumed:
+                nbytes = len (r.content)
+            else:
+                nbytes = int (r.headers.get ('Content-Length', 0))
+            body   = r.request.body if r.request is not None else None
+            sent   = len (body or '')
+        else:
+            status = exc.__class__.__name__
+            nbytes = sent = 0
+        tpl = self.template (method, url)
+        with self.lock:
+            ep = self.endpoints.get (tpl)
+            if ep is None:
+                ep = self.endpoints [tpl] = dict \
+                    ( count     = 0
+                    , time      = 0.0
+                    , max       = 0.0
+                    , bytes     = 0
+                    , sent      = 0
+                    , histogram = [0] * (len (self.buckets) + 1)
+                    , status    = Counter ()
+                    )
+            ep ['count'] += 1
+            ep ['time']  += elapsed
+            ep ['max']    = max (ep ['max'], elapsed)
+            ep ['bytes'] += nbytes
+            ep ['sent']  += sent
+            ep ['status'][status] += 1
+            for n, b in enumerate (self.buckets):
+                if elapsed <= b:
+                    break
+            else:
+                n = len (self.buckets)
+            ep ['histogram'][n] += 1
+        for tracer in self.tracers:
+            tracer (method, tpl, url, status, elapsed, nbytes)
+    # end def record
+
+    def as_dict (self):
+        """ Report sorted by total time, suitable for json.dumps """
+        labels = ['<=%gs' % b for b in self.buckets] \
+            + ['>%gs' % self.buckets [-1]]
+        r = {}
+        with self.lock:
+            eps = sorted \
+                (self.endpoints.items (), key = lambda x: -x [1]['time'])
+            for tpl, ep in eps:
+                r [tpl] = dict \
+                    ( count     = ep ['count']
+                    , time      = ep ['time']
+                    , mean      = ep ['time'] / ep ['count']
+                    , max       = ep ['max']
+                    , bytes     = ep ['bytes']
+                    , sent      = ep ['sent']
+                    , histogram = dict
+                        ( (l, h) for l, h in zip (labels, ep ['histogram'])
+                          if h
+                        )
+                    , status    = dict \
+                        ((str (k), v) for k, v in ep ['status'].items ())
+                    )
+        return r
+    # end def as_dict
+
+    def as_json (self):
+        return json.dumps (self.as_dict (), indent = 2)
+    # end def as_json
+
+    def as_table (self):
+        """ Tabular summary, endpoints taking most time first """
+        fmt = '%6s %9s %8s %8s %10s  %-20s %s'
+        r   = \
+            [ fmt
+            % ('count', 'total', 'mean', 'max', 'bytes', 'status', 'endpoint')
+            ]
+        for tpl, ep in self.as_dict ().items ():
+            status = ','.join \
+                ('%s:%s' % (k, v) for k, v in sorted (ep ['status'].items ()))
+            r.append \
+                ( fmt
+                % ( ep ['count']
+                  , '%.3fs' % ep ['time']
+                  , '%.3fs' % ep ['mean']
+                  , '%.3fs' % ep ['max']
+                  , ep ['bytes']
+                  , status
+                  , tpl
+                  )
+                )
+        return '\n'.join (r)
+    # end def as_table
+
+# end class Request_Stats
+
+class Response_Reader (io.RawIOBase):
+    """ Raw binary file over the chunks (iter_content) of a streamed
+        response. Each chunk is also written to the optional (binary)
+        spool file, e.g., for replaying the download later.
+    """
+
+    def __init__ (self, response, chunk_size = 65536, spool = None):
+        self.response = response
+        self.chunks   = response.iter_content (chunk_size)
+        self.spool    = spool
+        self.buffer   = b''
+    # end def __init__
+
+    def readable (self):
+        return True
+    # end def readable
+
+    def readinto (self, b):
+        while not self.buffer:
+            chunk = next (self.chunks, None)
+            if chunk is None:
+                return 0
+            if self.spool is not None:
+                self.spool.write (chunk)
+            self.buffer = chunk
+        n = min (len (b), len (self.buffer))
+        b [:n] = self.buffer [:n]
+        self.buffer = self.buffer [n:]
+        return n
+    # end def readinto
+
+    def close (self):
+        self.response.close ()
+        io.RawIOBase.close (self)
+    # end def close
+
+# end class Response_Reader
+
+class JSON_Collection_Reader (autosuper):
+    """ Incrementally decode a Roundup collection response of the form
+        {"data": {"collection": [...], ...}} from the text file fd and
+        yield the items of data.collection as they are read, only the
+        current item is held in memory.
+    >>> t = '{"data": {"@total_size": 3, "collection": [{"id": "1"},'
+    >>> t += ' {"id": "2", "s": "]}"}, 3]}}'
+    >>> list (JSON_Collection_Reader (io.StringIO (t), chunk_size = 4))
+    [{'id': '1'}, {'id': '2', 's': ']}'}, 3]
+    >>> list (JSON_Collection_Reader (io.StringIO ('{"data": {}}')))
+    Traceback (most recent call last):
+    ...
+    ValueError: No data.collection in response
+    """
+
+    ws = rc (r'[ \t\n\r]*')
+
+    def __init__ (self, fd, chunk_size = 65536):
+        self.fd         = fd
+        self.chunk_size = chunk_size
+        self.buf        = ''
+        self.pos        = 0
+        self.eof        = False
+        self.decoder    = json.JSONDecoder ()
+    # end def __init__
+
+    def fill (self):
+        """ Read more input, return False on end of file """
+        if self.eof:
+            return False
+        t = self.fd.read (self.chunk_size)
+        if not t:
+            self.eof = True
+            return False
+        self.buf = self.buf [self.pos:] + t
+        self.pos = 0
+        return True
+    # end def fill
+
+    def peek (self):
+        """ Skip whitespace and return next character """
+        while True:
+            self.pos = self.ws.match (self.buf, self.pos).end ()
+            if self.pos < len (self.buf):
+                return self.buf [self.pos]
+            if not self.fill ():
+                raise ValueError ("Unexpected end of JSON input")
+    # end def peek
+
+    def expect (self, c):
+        if self.peek () != c:
+            raise ValueError \
+                ( "Expected %r at %r"
+                % (c, self.buf [self.pos:self.pos + 20])
+                )
+        self.pos += 1
+    # end def expect
+
+    def value (self):
+        """ Decode the next JSON value, read more input while the
+            value is incomplete. A value ending at the end of the
+            buffer may be a truncated number, so we retry with more
+            input in that case, too.
+        """
+        self.peek ()
+        while True:
+            try:
+                v, end = self.decoder.raw_decode (self.buf, self.pos)
+            except ValueError:
+                if not self.fill ():
+                    raise
+                continue
+            if end == len (self.buf) and self.fill ():
+                continue
+            self.pos = end
+            return v
+    # end def value
+
+    def keys (self):
+        """ Iterate over keys of an object, the caller must consume
+            the value of each key.
+        """
+        self.expect ('{')
+        if self.peek () == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value ()
+            self.expect (':')
+            yield key
+            if self.peek () == ',':
+                self.pos += 1
+                continue
+            self.expect ('}')
+            return
+    # end def keys
+
+    def items (self):
+        """ Iterate over the items of an array """
+        self.expect ('[')
+        if self.peek () == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value ()
+            if self.peek () == ',':
+                self.pos += 1
+                continue
+            self.expect (']')
+            return
+    # end def items
+
+    def __iter__ (self):
+        for key in self.keys ():
+            if key != 'data':
+                self.value ()
+                continue
+            for k in self.keys ():
+                if k == 'collection':
+                    for item in self.items ():
+                        yield item
+                    return
+                self.value ()
+        raise ValueError ("No data.collection in response")
+    # end def __iter__
+
+# end class JSON_Collection_Reader
+
 class Requester (autosuper):
+    """ Access a web service via a requests session.
+        The transport settings below can be overridden in a derived
+        class or with keyword arguments of the same name: The number of
+        pooled connections (pool_connections is the number of hosts,
+        pool_maxsize the number of connections per host), keep_alive,
+        the default (connect, read) timeout in seconds and the number of
+        retries with exponential backoff (backoff_factor) for GET
+        requests that fail to connect or return one of retry_status.
+        An optional Response_Cache (cache) is used for GET requests,
+        an optional Request_Stats (stats) records all requests.
+        Identical GET requests issued concurrently (e.g. from an
+        Async_Requester) are coalesced into one request in flight
+        unless coalesce is False, the number of requests that were
+        saved is counted in coalesced.
+        We ask for compressed responses (accept_encoding), requests
+        does this by default, we make it explicit here. Note that the
+        server has to be configured to compress responses.
+        The transport adapters in adapters (a dictionary of URL prefix
+        to adapter) are mounted on each new session, this is used for
+        replacing the network with a stand-in (see hamradio.standin).
+    """
+
+    pool_connections = 10
+    pool_maxsize     = 10
+    keep_alive       = True
+    timeout          = (10, 120)
+    retries          = 3
+    backoff_factor   = 0.5
+    retry_status     = (429, 500, 502, 503, 504)
+    cache            = None
+    stats            = None
+    coalesce         = True
+    page_size        = 500
+    accept_encoding  = 'gzip, deflate'
+    adapters         = {}
+    transport_args   = \
+        ( 'pool_connections', 'pool_maxsize', 'keep_alive', 'timeout'
+        , 'retries', 'backoff_factor', 'retry_status', 'cache', 'stats'
+        , 'coalesce', 'accept_encoding'
+        )
 
     def __init__ (self, url, username, password = None, **kw):
-        self.session     = requests.session ()
+        for k in self.transport_args:
+            if k in kw:
+                setattr (self, k, kw.pop (k))
+        self.session     = self.make_session ()
         self.url         = url
         self.username    = username
         self.password    = password
@@ -49,14 +674,49 @@ class Requester (autosuper):
         self._pw         = None
         self.relax_check = False
         self.cookies     = None
+        self.in_flight   = {}
+        self.flight_lock = Lock ()
+        self.coalesced   = 0
         if kw.get ('relax_username_check', False):
             self.relax_check = True
         self.__super.__init__ (**kw)
     # end def __init__
 
+    def make_session (self):
+        """ Session with connection pool and retry policy, only
+            idempotent methods are retried.
+        """
+        session = requests.session ()
+        retry   = Retry \
+            ( total            = self.retries
+            , backoff_factor   = self.backoff_factor
+            , status_forcelist = self.retry_status
+            , allowed_methods  = frozenset (('GET', 'HEAD'))
+            , raise_on_status  = False
+            )
+        adapter = HTTPAdapter \
+            ( pool_connections = self.pool_connections
+            , pool_maxsize     = self.pool_maxsize
+            , max_retries      = retry
+            )
+        session.mount ('http://',  adapter)
+        session.mount ('https://', adapter)
+        for prefix in self.adapters:
+            session.mount (prefix, self.adapters [prefix])
+        if not self.keep_alive:
+            session.headers ['Connection'] = 'close'
+        if self.accept_encoding:
+            session.headers ['Accept-Encoding'] = self.accept_encoding
+        return session
+    # end def make_session
+
     def get (self, s, as_text=False, as_result = False, **kw):
         u = self.url + s
-        r = self.session.get (u, headers = self.headers, **kw)
+        kw.setdefault ('timeout', self.timeout)
+        if self.coalesce and list (kw) == ['timeout']:
+            r = self.single_flight (s, u, **kw)
+        else:
+            r = self.do_get (s, u, **kw)
         if not (200 <= r.status_code <= 299):
             raise RuntimeError \
                 ( 'Invalid get result: %s: %s for %s\n    %s'
@@ -69,6 +729,137 @@ class Requester (autosuper):
         return r.json ()
     # end def get
 
+    def do_get (self, s, u, **kw):
+        if self.cache is not None:
+            return self.request \
+                ( 'get', s, self.cache.get
+                , self.session, u, headers = self.headers, **kw
+                )
+        return self.request \
+            ('get', s, self.session.get, u, headers = self.headers, **kw)
+    # end def do_get
+
+    def single_flight (self, s, u, **kw):
+        """ Only the first caller for u does the request, callers
+            arriving while it is in flight wait for it and share the
+            response (or the exception). The response is shared, not
+            the decoded JSON: callers are free to modify their result.
+        """
+        with self.flight_lock:
+            flight = self.in_flight.get (u)
+            leader = flight is None
+            if leader:
+                flight = self.in_flight [u] = Future ()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return flight.result ()
+        try:
+            r = self.do_get (s, u, **kw)
+        except BaseException as exc:
+            self.land (u, flight)
+            flight.set_exception (exc)
+            raise
+        self.land (u, flight)
+        flight.set_result (r)
+        return r
+    # end def single_flight
+
+    def land (self, u, flight):
+        """ Remove flight unless it was already grounded """
+        with self.flight_lock:
+            if self.in_flight.get (u) is flight:
+                del self.in_flight [u]
+    # end def land
+
+    def ground (self, u):
+        """ After a PUT/POST to u requests for the resource, its
+            collection and its items that are already in flight may
+            return the old state: Later callers must not join them.
+        """
+        p = Response_Cache.path (u)
+        with self.flight_lock:
+            for k in list (self.in_flight):
+                q = Response_Cache.path (k)
+                if q == p or q.startswith (p + '/') or p.startswith (q + '/'):
+                    del self.in_flight [k]
+    # end def ground
+
+    def get_stream (self, s, spool = None, chunk_size = 65536, **kw):
+        """ Streaming GET: Return a text file object that reads the
+            response incrementally, decoding it with the encoding of
+            the response (utf-8 if none is given). Use it as a context
+            manager to release the connection. The raw body is copied
+            to the binary file spool if given.
+        """
+        u = self.url + s
+        kw.setdefault ('timeout', self.timeout)
+        r = self.do_get (s, u, stream = True, **kw)
+        if not (200 <= r.status_code <= 299):
+            raise RuntimeError \
+                ( 'Invalid get result: %s: %s for %s\n    %s'
+                % (r.status_code, r.reason, u, r.text)
+                )
+        raw = Response_Reader (r, chunk_size, spool)
+        return io.TextIOWrapper \
+            ( io.BufferedReader (raw, chunk_size)
+            , encoding = r.encoding or 'utf-8'
+            , errors   = 'replace'
+            , newline  = ''
+            )
+    # end def get_stream
+
+    def iter_pages (self, s, page_size = None):
+        """ Retrieve the Roundup collection s (a class with optional
+            query) page by page using @page_size and @page_index and
+            yield the collection of each page. The next page is
+            retrieved in the background while the caller processes the
+            current one. Note that modifying items in a way that changes
+            the result of the query while iterating will skip items.
+        """
+        page_size = page_size or self.page_size
+        sep       = '&' if '?' in s else '?'
+        def page (index):
+            d = {'@page_size' : page_size, '@page_index' : index}
+            return self.get (s + sep + urlencode (d)) ['data']['collection']
+        with ThreadPoolExecutor (max_workers = 1) as executor:
+            index  = 1
+            future = executor.submit (page, index)
+            while future is not None:
+                items  = future.result ()
+                future = None
+                if len (items) >= page_size:
+                    index += 1
+                    future = executor.submit (page, index)
+                if items:
+                    yield items
+    # end def iter_pages
+
+    def iter_collection (self, s, page_size = None):
+        """ Like iter_pages but yield the items of each page.
+            With a page_size of 0 the whole collection is retrieved
+            in one streamed response, see stream_collection.
+        """
+        if page_size == 0:
+            for item in self.stream_collection (s):
+                yield item
+            return
+        for items in self.iter_pages (s, page_size):
+            for item in items:
+                yield item
+    # end def iter_collection
+
+    def stream_collection (self, s, **kw):
+        """ Retrieve the Roundup collection s in one response and
+            yield its items while the response is read: The body is
+            decompressed and decoded incrementally, so memory use does
+            not depend on the size of the collection.
+        """
+        with self.get_stream (s, **kw) as f:
+            for item in JSON_Collection_Reader (f):
+                yield item
+    # end def stream_collection
+
     def get_pw (self):
         """ Password given as option takes precedence.
             Next we try password via .netrc. If that doesn't work we ask.
@@ -109,7 +900,7 @@ class Requester (autosuper):
         , as_result = False
         , **kw
         ):
-        d = {}
+        d = dict (timeout = self.timeout)
         d.update (kw)
         if data:
             d ['data'] = data
@@ -118,7 +909,11 @@ class Requester (autosuper):
         h = dict (self.headers)
         if etag:
             h ['If-Match'] = etag
-        r = method (self.url + s, headers = h, **d)
+        r = self.request \
+            (method.__name__, s, method, self.url + s, headers = h, **d)
+        self.ground (self.url + s)
+        if self.cache is not None:
+            self.cache.invalidate (self.url + s)
         if not (200 <= r.status_code <= 299):
             raise RuntimeError \
                 ( 'Invalid put/post result: %s: %s\n    %s'
@@ -139,9 +934,131 @@ class Requester (autosuper):
         return self.post_or_put (self.session.put, s, ** kw)
     # end def put
 
+    def request (self, name, s, method, *args, **kw):
+        """ Call method (doing the request for s) and record it in
+            stats if enabled.
+        """
+        if self.stats is None:
+            return method (*args, **kw)
+        t = time.perf_counter ()
+        try:
+            r = method (*args, **kw)
+        except Exception as exc:
+            self.stats.record (name, s, time.perf_counter () - t, exc = exc)
+            raise
+        self.stats.record (name, s, time.perf_counter () - t, r)
+        return r
+    # end def request
+
     def set_basic_auth (self):
         # Basic Auth: user, password
         self.session.auth = (self.username, self.get_pw ())
     # end def set_basic_auth
 
 # end class Requester
+
+class Async_Requester (autosuper):
+    """ Asyncio counterpart of a Requester: The blocking methods of the
+        wrapped requester are run in a thread pool with at most
+        concurrency requests in flight. URL, authentication, etag
+        handling and error semantics are those of the wrapped
+        requester, its connection pool (pool_maxsize) should be at
+        least as large as concurrency.
+    """
+
+    def __init__ (self, requester, concurrency = 8, **kw):
+        self.requester   = requester
+        self.concurrency = concurrency
+        self.executor    = ThreadPoolExecutor (max_workers = concurrency)
+        self._loop       = None
+        self._semaphore  = None
+        self.__super.__init__ (**kw)
+    # end def __init__
+
+    @property
+    def semaphore (self):
+        """ A semaphore is bound to an event loop, create a new one
+            when we're called from a different loop.
+        """
+        loop = asyncio.get_running_loop ()
+        if self._loop is not loop:
+            self._loop      = loop
+            self._semaphore = asyncio.Semaphore (self.concurrency)
+        return self._semaphore
+    # end def semaphore
+
+    async def call (self, method, *args, **kw):
+        """ Call a blocking method (usually of our requester)
+        """
+        loop = asyncio.get_running_loop ()
+        async with self.semaphore:
+            return await loop.run_in_executor \
+                (self.executor, partial (method, *args, **kw))
+    # end def call
+
+    async def get (self, s, **kw):
+        return await self.call (self.requester.get, s, **kw)
+    # end def get
+
+    async def post (self, s, **kw):
+        return await self.call (self.requester.post, s, **kw)
+    # end def post
+
+    async def put (self, s, **kw):
+        return await self.call (self.requester.put, s, **kw)
+    # end def put
+
+    @property
+    def window (self):
+        """ Number of calls submitted ahead of the result we wait for
+        """
+        return 2 * self.concurrency
+    # end def window
+
+    async def gather (self, method, *iterables):
+        """ Like the builtin map but runs the calls concurrently, the
+            results are returned in order, the first exception is
+            propagated. Arguments are taken from the iterables only
+            when a call can be started, at most window calls are
+            pending.
+        """
+        results = []
+        pending = deque ()
+        try:
+            for args in zip (*iterables):
+                if len (pending) >= self.window:
+                    results.append (await pending.popleft ())
+                pending.append \
+                    (asyncio.ensure_future (self.call (method, *args)))
+            while pending:
+                results.append (await pending.popleft ())
+        finally:
+            for t in pending:
+                t.cancel ()
+        return results
+    # end def gather
+
+    def map (self, method, *iterables):
+        """ Synchronous version of gather for non-async callers: A
+            generator yielding the results in order. Like gather it
+            takes the arguments lazily, so a streamed input is not
+            read completely before the first result.
+        """
+        pending = deque ()
+        try:
+            for args in zip (*iterables):
+                if len (pending) >= self.window:
+                    yield pending.popleft ().result ()
+                pending.append (self.executor.submit (method, *args))
+            while pending:
+                yield pending.popleft ().result ()
+        finally:
+            for f in pending:
+                f.cancel ()
+    # end def map
+
+    def close (self):
+        self.executor.shutdown ()
+    # end def close
+
+# end class Async_Requester
@@ -0,0 +1,965 @@
+#!/usr/bin/python3
+# Copyright (C) 2026 Dr. Ralf Schlatterbeck Open Source Consulting.
+# Reichergasse 131, A-3411 Weidling.
+# Web: http://www.runtux.com Email: office@runtux.com
+# ****************************************************************************
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS
+# IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED
+# TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A
+# PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED
+# TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ****************************************************************************
+
+""" Stand-in for the services used by qso-import and qsl-export
+    A requests transport adapter answers all requests of a Requester
+    from memory instead of the network: The Roundup REST API (rest/data/)
+    of the logging database is served from a synthetic in-memory store,
+    LoTW (lotwreport.adi) and eQSL (DownloadInBox.cfm, DownloadADIF.cfm,
+    GeteQSL.cfm) answers are synthesized from the QSLs in the store or
+    replayed from recorded responses. A configurable latency is added
+    to each request and all requests are counted per endpoint, so that
+    throughput and request counts can be measured reproducibly.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import requests
+from argparse            import ArgumentParser, REMAINDER
+from threading           import Lock
+from datetime            import datetime, timedelta
+from email.parser        import BytesParser
+from http.client         import responses
+from urllib.parse        import urlparse, parse_qsl
+from requests.adapters   import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from rsclib.autosuper    import autosuper
+from hamradio.requester  import Requester, Request_Stats
+
+class Roundup_Error (ValueError):
+
+    def __init__ (self, status, msg):
+        self.status = status
+        ValueError.__init__ (self, msg)
+    # end def __init__
+
+# end class Roundup_Error
+
+class Roundup_Store (autosuper):
+    """ In-memory store of the classes of the logging database.
+        Properties have a type of string, date, number, integer, or
+        link:<class> and multilink:<class>. Links can be given by id
+        or by the key property of the linked class. Exact match filters
+        (links, strings with a trailing ':' and '-' for empty values)
+        use indexes on the (possibly dotted) property path that are
+        maintained on create and dropped when a property they depend
+        on is changed.
+    """
+
+    date_format = '%Y-%m-%d.%H:%M:%S'
+
+    schema = dict \
+        ( user        = dict (username = 'string', realname = 'string')
+        , dxcc_entity = dict \
+            (code = 'string', name = 'string', shortname = 'string')
+        , ham_band    = dict (name = 'string')
+        , ham_mode    = dict \
+            (name = 'string', adif_mode = 'string', adif_submode = 'string')
+        , antenna     = dict (name = 'string')
+        , qsl_type    = dict (name = 'string')
+        , msg         = dict \
+            ( content = 'string', type = 'string'
+            , author  = 'string', date = 'date'
+            )
+        , file        = dict \
+            (name = 'string', type = 'string', content = 'string')
+        , ham_call    = dict \
+            ( name          = 'string'
+            , call          = 'string'
+            , gridsquare    = 'string'
+            , eqsl_nickname = 'string'
+            , cardname      = 'string'
+            , qth           = 'string'
+            , iota          = 'string'
+            , cq_zone       = 'integer'
+            , itu_zone      = 'integer'
+            , owner         = 'link:user'
+            , dxcc_entity   = 'link:dxcc_entity'
+            )
+        , qso         = dict \
+            ( call          = 'string'
+            , qso_start     = 'date'
+            , qso_end       = 'date'
+            , owner         = 'link:ham_call'
+            , band          = 'link:ham_band'
+            , mode          = 'link:ham_mode'
+            , antenna       = 'link:antenna'
+            , freq          = 'number'
+            , tx_pwr        = 'number'
+            , rst_sent      = 'string'
+            , rst_rcvd      = 'string'
+            , gridsquare    = 'string'
+            , name          = 'string'
+            , qth           = 'string'
+            , iota          = 'string'
+            , cq_zone       = 'integer'
+            , itu_zone      = 'integer'
+            , dxcc_entity   = 'link:dxcc_entity'
+            , qsl_via       = 'string'
+            , remarks       = 'string'
+            , swl           = 'link:qso'
+            , messages      = 'multilink:msg'
+            )
+        , qsl         = dict \
+            ( qso           = 'link:qso'
+            , qsl_type      = 'link:qsl_type'
+            , date_sent     = 'date'
+            , date_recv     = 'date'
+            , qso_time      = 'date'
+            , gridsquare    = 'string'
+            , rst_rcvd      = 'string'
+            , files         = 'multilink:file'
+            )
+        )
+    keys = dict \
+        ( user        = 'username'
+        , dxcc_entity = 'code'
+        , ham_band    = 'name'
+        , ham_mode    = 'name'
+        , antenna     = 'name'
+        , qsl_type    = 'name'
+        , ham_call    = 'name'
+        )
+
+    def __init__ (self):
+        self.nodes   = dict ((cls, {}) for cls in self.schema)
+        self.next_id = dict ((cls, 1)  for cls in self.schema)
+        self.indexes = {}
+        self.lock    = Lock ()
+    # end def __init__
+
+    def path_type (self, cls, path):
+        """ Type of the dotted property path starting at cls and the
+            (class, property) pairs the value depends on.
+        """
+        deps = []
+        parts = path.split ('.')
+        for n, p in enumerate (parts):
+            if p == 'id':
+                return 'string', deps
+            if p not in self.schema [cls]:
+                raise Roundup_Error \
+                    (400, 'Unknown property "%s" of class %s' % (p, cls))
+            t = self.schema [cls][p]
+            deps.append ((cls, p))
+            if n == len (parts) - 1:
+                return t, deps
+            if not t.startswith ('link:'):
+                raise Roundup_Error (400, 'Invalid property path %s' % path)
+            cls = t.split (':') [1]
+    # end def path_type
+
+    def walk (self, cls, id, path):
+        """ Value of the dotted property path for item id """
+        node = self.nodes [cls][id]
+        for p in path.split ('.'):
+            if p == 'id':
+                return id
+            v = node.get (p)
+            t = self.schema [cls][p]
+            if v is None or not t.startswith ('link:'):
+                break
+            cls  = t.split (':') [1]
+            id   = v
+            node = self.nodes [cls][v]
+        else:
+            return id
+        return v
+    # end def walk
+
+    def lookup (self, cls, value):
+        """ Id of item in cls given by id or key, None if not found """
+        value = str (value)
+        if value in self.nodes [cls]:
+            return value
+        key = self.keys.get (cls)
+        if key:
+            for id, node in self.nodes [cls].items ():
+                if node.get (key) == value:
+                    return id
+        return None
+    # end def lookup
+
+    def convert (self, cls, values):
+        r = {}
+        for k, v in values.items ():
+            if k not in self.schema [cls]:
+                raise Roundup_Error \
+                    (400, 'Unknown property "%s" of class %s' % (k, cls))
+            t = self.schema [cls][k]
+            if v is None or v == '' or v == []:
+                r [k] = [] if t.startswith ('multilink') else None
+                continue
+            if t.startswith ('link:') or t.startswith ('multilink:'):
+                target = t.split (':') [1]
+                vals   = v
+                if t.startswith ('link:'):
+                    vals = [v]
+                elif isinstance (v, str):
+                    vals = v.split (',')
+                ids = []
+                for x in vals:
+                    if isinstance (x, dict):
+                        x = x ['id']
+                    id = self.lookup (target, x)
+                    if id is None:
+                        raise Roundup_Error \
+                            (400, 'No %s with id or key "%s"' % (target, x))
+                    ids.append (id)
+                v = ids [0] if t.startswith ('link:') else ids
+            elif t == 'integer':
+                v = int (v)
+            elif t == 'number':
+                v = float (v)
+                if v == int (v):
+                    v = int (v)
+            else:
+                v = str (v)
+            r [k] = v
+        return r
+    # end def convert
+
+    def index_keys (self, value):
+        if isinstance (value, list):
+            return value or [None]
+        if value == '':
+            return [None]
+        return [value]
+    # end def index_keys
+
+    def index (self, cls, path):
+        """ Index of values of path (dotted property) for items of cls
+        """
+        if (cls, path) not in self.indexes:
+            t, deps = self.path_type (cls, path)
+            idx = {}
+            for id in self.nodes [cls]:
+                for k in self.index_keys (self.walk (cls, id, path)):
+                    idx.setdefault (k, set ()).add (id)
+            self.indexes [(cls, path)] = (idx, set (deps))
+        return self.indexes [(cls, path)][0]
+    # end def index
+
+    def create (self, cls, values):
+        values = self.convert (cls, values)
+        id = str (self.next_id [cls])
+        self.next_id [cls] += 1
+        node = dict ((p, None) for p in self.schema [cls])
+        for p, t in self.schema [cls].items ():
+            if t.startswith ('multilink'):
+                node [p] = []
+        node.update (values)
+        self.nodes [cls][id] = node
+        for (c, path), (idx, deps) in self.indexes.items ():
+            if c == cls:
+                for k in self.index_keys (self.walk (cls, id, path)):
+                    idx.setdefault (k, set ()).add (id)
+        return id
+    # end def create
+
+    def set (self, cls, id, values):
+        values = self.convert (cls, values)
+        self.nodes [cls][id].update (values)
+        changed = set ((cls, p) for p in values)
+        for k in list (self.indexes):
+            if self.indexes [k][1] & changed:
+                del self.indexes [k]
+        return values
+    # end def set
+
+    def etag (self, cls, id):
+        node = self.nodes [cls][id]
+        h = hashlib.md5 (json.dumps (node, sort_keys = True).encode ('utf-8'))
+        return '"%s"' % h.hexdigest ()
+    # end def etag
+
+    def render (self, t, value, base, verbose = 1):
+        """ Render a property value as the REST API does """
+        if not t.startswith ('link:') and not t.startswith ('multilink:'):
+            return value
+        cls = t.split (':') [1]
+        def link (id):
+            d = dict (id = id, link = '%s%s/%s' % (base, cls, id))
+            key = self.keys.get (cls)
+            if verbose > 1 and key:
+                d [key] = self.nodes [cls][id][key]
+            return d
+        if t.startswith ('link:'):
+            if value is None:
+                return None
+            return link (value)
+        return [link (id) for id in value]
+    # end def render
+
+    def item (self, cls, id, base, query):
+        if id not in self.nodes [cls]:
+            raise Roundup_Error (404, 'Item %s/%s not found' % (cls, id))
+        verbose = int (query.get ('@verbose', 1))
+        fields  = list (self.schema [cls])
+        if query.get ('@fields'):
+            fields = query ['@fields'].split (',')
+        attr = {}
+        for f in fields:
+            t, deps = self.path_type (cls, f)
+            attr [f] = self.render \
+                (t, self.walk (cls, id, f), base, verbose)
+        return dict \
+            ( id         = id
+            , type       = cls
+            , link       = '%s%s/%s' % (base, cls, id)
+            , attributes = attr
+            , **{'@etag' : self.etag (cls, id)}
+            )
+    # end def item
+
+    def matcher (self, cls, path, value):
+        """ Return a set of candidate ids if the filter can use an
+            index and a predicate on the value of path.
+        """
+        exact = path.endswith (':')
+        path  = path.rstrip (':')
+        t, deps = self.path_type (cls, path)
+        if value == '-':
+            return self.index (cls, path).get (None, set ()), None
+        if t.startswith ('link:') or t.startswith ('multilink:'):
+            target = t.split (':') [1]
+            ids = set (self.lookup (target, v) for v in value.split (','))
+            idx = self.index (cls, path)
+            return set ().union (*(idx.get (i, set ()) for i in ids)), None
+        if t == 'string' and exact:
+            return self.index (cls, path).get (value, set ()), None
+        if t == 'date':
+            if ';' in value:
+                lo, hi = value.split (';', 1)
+                def pred (v):
+                    return bool \
+                        ( v
+                        and (not lo or v >= lo)
+                        and (not hi or v [:len (hi)] <= hi)
+                        )
+            else:
+                def pred (v):
+                    return bool (v and v.startswith (value))
+        elif t in ('number', 'integer'):
+            def pred (v):
+                return v is not None and float (v) == float (value)
+        else:
+            def pred (v):
+                return bool (v and value.lower () in v.lower ())
+        return None, (path, pred)
+    # end def matcher
+
+    def sort_key (self, cls, path):
+        t, deps = self.path_type (cls, path)
+        def key (id):
+            v = self.walk (cls, id, path)
+            if t.startswith ('link:') and v is not None:
+                target = t.split (':') [1]
+                k = self.keys.get (target)
+                v = self.nodes [target][v][k] if k else int (v)
+            if path == 'id':
+                v = int (v)
+            return (v is not None, v if v is not None else 0)
+        return key
+    # end def sort_key
+
+    def collection (self, cls, base, query):
+        candidates = None
+        preds = []
+        for k, v in query.items ():
+            if k.startswith ('@'):
+                continue
+            ids, pred = self.matcher (cls, k, v)
+            if pred:
+                preds.append (pred)
+            elif candidates is None or len (ids) < len (candidates):
+                if candidates is not None:
+                    ids = ids & candidates
+                candidates = ids
+            else:
+                candidates = candidates & ids
+        if candidates is None:
+            candidates = self.nodes [cls]
+        ids = [id for id in candidates
+               if all (p (self.walk (cls, id, path)) for path, p in preds)
+              ]
+        ids.sort (key = int)
+        sort = query.get ('@sort')
+        if sort:
+            for s in reversed (sort.split (',')):
+                rev = s.startswith ('-')
+                key = self.sort_key (cls, s.lstrip ('+-'))
+                ids.sort (key = key, reverse = rev)
+        total = len (ids)
+        if '@page_size' in query:
+            size  = int (query ['@page_size'])
+            index = int (query.get ('@page_index', 1))
+            ids   = ids [(index - 1) * size:index * size]
+        fields = []
+        if query.get ('@fields'):
+            fields = query ['@fields'].split (',')
+        verbose = int (query.get ('@verbose', 1))
+        coll = []
+        for id in ids:
+            d = dict (id = id, link = '%s%s/%s' % (base, cls, id))
+            for f in fields:
+                t, deps = self.path_type (cls, f)
+                d [f] = self.render (t, self.walk (cls, id, f), base, verbose)
+            coll.append (d)
+        return {'collection' : coll, '@total_size' : total}
+    # end def collection
+
+    @classmethod
+    def synthetic (cls, qsos = 1000, seed = 42, start = None):
+        """ Create a store with the lookup tables, one station
+            (OE3RSU Weidling) and the given number of random QSOs,
+            each with a LOTW and an eQSL QSL record (sent, some of them
+            received) and for some a Bureau QSL that is not yet sent.
+        >>> st = Roundup_Store.synthetic (qsos = 10)
+        >>> len (st.nodes ['qso']), len (st.nodes ['qsl'])
+        (10, 21)
+        >>> q = dict ((('qso.call:', st.nodes ['qso']['3']['call']),))
+        >>> len (st.collection ('qsl', '/', q) ['collection'])
+        2
+        """
+        rnd   = random.Random (seed)
+        store = cls ()
+        store.create ('user', dict (username = 'ralf', realname = 'Ralf'))
+        entities = \
+            [ ('206', 'Austria',                  '',        'OE', 15, 28)
+            , ('230', 'Fed. Rep. of Germany',     'Germany', 'DL', 14, 28)
+            , ('223', 'England',                  '',        'G',  14, 27)
+            , ('503', 'Czech Republic',           '',        'OK', 15, 28)
+            , ('281', 'Spain',                    '',        'EA', 14, 37)
+            , ('248', 'Italy',                    '',        'I',  15, 28)
+            , ('291', 'United States of America', 'USA',     'W',  5,  8)
+            , ('339', 'Japan',                    '',        'JA', 25, 45)
+            ]
+        for code, name, short, pfx, cq, itu in entities:
+            store.create \
+                ( 'dxcc_entity'
+                , dict (code = code, name = name, shortname = short)
+                )
+        bands = \
+            [ ('40m', 7.074), ('30m', 10.136), ('20m', 14.074)
+            , ('17m', 18.100), ('15m', 21.074), ('12m', 24.915)
+            , ('10m', 28.074)
+            ]
+        for name, f in bands:
+            store.create ('ham_band', dict (name = name))
+        modes = \
+            [ ('FT8', 'FT8', ''), ('FT4', 'MFSK', 'FT4'), ('CW', 'CW', '')
+            , ('SSB', 'SSB', 'USB'), ('PSK31', 'PSK', 'PSK31')
+            ]
+        for name, mode, submode in modes:
+            store.create \
+                ( 'ham_mode'
+                , dict (name = name, adif_mode = mode, adif_submode = submode)
+                )
+        antennas = dict \
+            (( ('40m', 'Magnetic Loop D=3.5m'), ('30m', 'Magnetic Loop D=1.9m')
+            ,  ('20m', 'Magnetic Loop D=88cm'), ('17m', 'Magnetic Loop D=88cm')
+            ,  ('15m', 'Magnetic Loop D=57cm'), ('12m', 'Magnetic Loop D=57cm')
+            ,  ('10m', 'Magnetic Loop D=57cm')
+            ))
+        for name in sorted (set (antennas.values ())):
+            store.create ('antenna', dict (name = name))
+        for name in ('Bureau', 'LOTW', 'eQSL'):
+            store.create ('qsl_type', dict (name = name))
+        store.create \
+            ( 'ham_call'
+            , dict \
+                ( name          = 'OE3RSU Weidling'
+                , call          = 'OE3RSU'
+                , gridsquare    = 'JN88ef'
+                , eqsl_nickname = 'Weidling'
+                , qth           = 'Weidling'
+                , cq_zone       = 15
+                , itu_zone      = 28
+                , owner         = 'ralf'
+                , dxcc_entity   = '206'
+                )
+            )
+        fmt = cls.date_format
+        t   = start or datetime (2024, 1, 1)
+        letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+        for n in range (qsos):
+            t     += timedelta (minutes = rnd.randint (1, 30))
+            code, name, short, pfx, cq, itu = rnd.choice (entities)
+            call   = pfx + str (rnd.randint (1, 9)) \
+                   + ''.join (rnd.choice (letters) for i in range (3))
+            band, f = rnd.choice (bands)
+            mode   = rnd.choice (modes)
+            grid   = rnd.choice (letters [:18]) + rnd.choice (letters [:18]) \
+                   + '%02d' % rnd.randint (0, 99)
+            rst    = '-%02d' % rnd.randint (1, 20)
+            if mode [0] == 'CW':
+                rst = '599'
+            end    = t + timedelta (minutes = 1)
+            qso = store.create \
+                ( 'qso'
+                , dict \
+                    ( call        = call
+                    , qso_start   = t.strftime (fmt)
+                    , qso_end     = end.strftime (fmt)
+                    , owner       = '1'
+                    , band        = band
+                    , mode        = mode [0]
+                    , antenna     = antennas [band]
+                    , freq        = f
+                    , tx_pwr      = 5
+                    , rst_sent    = rst
+                    , rst_rcvd    = rst
+                    , gridsquare  = grid
+                    , cq_zone     = cq
+                    , itu_zone    = itu
+                    , dxcc_entity = code
+                    )
+                )
+            sent = (t + timedelta (days = 1)).strftime (fmt)
+            for qsl_type, ratio in (('LOTW', 0.6), ('eQSL', 0.3)):
+                recv = None
+                if rnd.random () < ratio:
+                    days = rnd.randint (1, 60)
+                    recv = (t + timedelta (days = days)).strftime (fmt)
+                store.create \
+                    ( 'qsl'
+                    , dict \
+                        ( qso       = qso
+                        , qsl_type  = qsl_type
+                        , date_sent = sent
+                        , date_recv = recv
+                        )
+                    )
+            if rnd.random () < 0.1:
+                store.create ('qsl', dict (qso = qso, qsl_type = 'Bureau'))
+        return store
+    # end def synthetic
+
+# end class Roundup_Store
+
+def adif_field (name, value):
+    value = str (value)
+    return '<%s:%d>%s ' % (name, len (value), value)
+# end def adif_field
+
+class Standin_Adapter (BaseAdapter):
+    """ Transport adapter answering all requests from the store and
+        the recorded responses. The latency (in seconds) is either a
+        number or a dictionary by service (roundup, lotw, eqsl).
+        Recorded responses are given as a dictionary of bytes by name:
+        lotw-qso and lotw-qsl (ADIF returned by lotwreport.adi),
+        eqsl-inbox and eqsl-outbox (ADIF files linked from
+        DownloadInBox.cfm and DownloadADIF.cfm) and eqsl-card (the
+        image returned for GeteQSL.cfm). Everything not recorded is
+        synthesized from the QSLs in the store. Requests are counted in
+        stats, a Request_Stats instance.
+    """
+
+    prefixes = ('http://', 'https://')
+
+    png = \
+        ( b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00'
+          b'\x01\x08\x06\x00\x00\x00\x1f\x15\xc4\x89\x00\x00\x00\rIDATx'
+          b'\x9cc\xf8\x0f\x00\x00\x01\x01\x00\x05\x18\xd8N\x00\x00\x00\x00'
+          b'IEND\xaeB`\x82'
+        )
+
+    def __init__ (self, store, latency = 0, recorded = None):
+        self.store    = store
+        self.latency  = latency
+        self.recorded = recorded or {}
+        self.stats    = Request_Stats ()
+        self.files    = {}
+        self.saved    = None
+        BaseAdapter.__init__ (self)
+    # end def __init__
+
+    def install (self, requester = None):
+        """ Use the stand-in for the session of the given requester.
+            Without a requester it is used for all Requester objects
+            created until uninstall, for this the result can be used
+            as a context manager:
+            with adapter.install ():
+                ...
+        """
+        if requester is not None:
+            for prefix in self.prefixes:
+                requester.session.mount (prefix, self)
+            return self
+        if self.saved is None:
+            self.saved = Requester.adapters
+            Requester.adapters = dict ((p, self) for p in self.prefixes)
+        return self
+    # end def install
+
+    def uninstall (self):
+        """ Restore the adapters in use before install """
+        if self.saved is not None:
+            Requester.adapters = self.saved
+            self.saved = None
+    # end def uninstall
+
+    def __enter__ (self):
+        return self
+    # end def __enter__
+
+    def __exit__ (self, *exc):
+        self.uninstall ()
+    # end def __exit__
+
+    def delay (self, service):
+        latency = self.latency
+        if isinstance (latency, dict):
+            latency = latency.get (service, 0)
+        if latency:
+            time.sleep (latency)
+    # end def delay
+
+    def response (self, request, status, body, content_type, headers = {}):
+        if isinstance (body, str):
+            body = body.encode ('utf-8')
+        r = requests.Response ()
+        r.status_code       = status
+        r.reason            = responses.get (status, '')
+        r.url               = request.url
+        r.request           = request
+        r.connection        = self
+        r._content          = body
+        r._content_consumed = True
+        r.headers = CaseInsensitiveDict (headers)
+        r.headers ['Content-Type']   = content_type
+        r.headers ['Content-Length'] = str (len (body))
+        r.encoding = requests.utils.get_encoding_from_headers (r.headers)
+        return r
+    # end def response
+
+    def send (self, request, **kw):
+        t   = time.perf_counter ()
+        url = urlparse (request.url)
+        if '/rest/data/' in url.path:
+            service, name = 'roundup', url.path.split ('/rest/data/', 1) [1]
+            handler = self.roundup
+        elif url.path.endswith ('lotwreport.adi'):
+            service, name = 'lotw', url.path.rsplit ('/', 1) [-1]
+            handler = self.lotw
+        elif url.netloc.endswith ('eqsl.cc'):
+            service, name = 'eqsl', url.path.rsplit ('/', 1) [-1]
+            handler = self.eqsl
+        else:
+            service, name, handler = None, url.path, None
+        self.delay (service)
+        if handler:
+            query = dict (parse_qsl (url.query, keep_blank_values = True))
+            r = handler (request, name, query)
+        else:
+            r = self.response (request, 404, 'Not found', 'text/plain')
+        if url.query:
+            name += '?' + url.query
+        self.stats.record \
+            ( request.method.lower ()
+            , '%s:%s' % (service, name)
+            , time.perf_counter () - t
+            , r
+            )
+        return r
+    # end def send
+
+    def close (self):
+        pass
+    # end def close
+
+    def body (self, request):
+        """ Request body as a dictionary of values """
+        ct   = request.headers.get ('Content-Type', '')
+        body = request.body or b''
+        if isinstance (body, str):
+            body = body.encode ('utf-8')
+        if ct.startswith ('application/json'):
+            return json.loads (body)
+        if ct.startswith ('multipart/form-data'):
+            h = b'Content-Type: ' + ct.encode ('ascii') + b'\r\n\r\n'
+            msg = BytesParser ().parsebytes (h + body)
+            d = {}
+            for part in msg.get_payload ():
+                name = part.get_param ('name', header = 'content-disposition')
+                d [name] = part.get_payload (decode = True).decode ('latin-1')
+            return d
+        return dict (parse_qsl (body.decode ('utf-8')))
+    # end def body
+
+    def roundup (self, request, name, query):
+        base  = request.url.split ('/rest/data/', 1) [0] + '/rest/data/'
+        parts = name.strip ('/').split ('/')
+        cls   = parts [0]
+        store = self.store
+        code  = 200
+        try:
+            if cls not in store.schema:
+                raise Roundup_Error (404, 'Class %s not found' % cls)
+            if len (parts) > 2:
+                raise Roundup_Error (404, 'Invalid path %s' % name)
+            with store.lock:
+                if request.method == 'GET' and len (parts) == 1:
+                    data = store.collection (cls, base, query)
+                elif request.method == 'GET':
+                    data = store.item (cls, parts [1], base, query)
+                elif request.method == 'POST' and len (parts) == 1:
+                    id   = store.create (cls, self.body (request))
+                    data = dict (id = id, link = '%s%s/%s' % (base, cls, id))
+                    code = 201
+                elif request.method == 'PUT' and len (parts) == 2:
+                    id = parts [1]
+                    if id not in store.nodes [cls]:
+                        raise Roundup_Error \
+                            (404, 'Item %s/%s not found' % (cls, id))
+                    etag = request.headers.get ('If-Match')
+                    if etag != store.etag (cls, id):
+                        raise Roundup_Error (412, 'Etag is missing or invalid')
+                    changed = store.set (cls, id, self.body (request))
+                    data = dict \
+                        ( type      = cls
+                        , id        = id
+                        , attribute = changed
+                        , link      = '%s%s/%s' % (base, cls, id)
+                        )
+                else:
+                    raise Roundup_Error (405, 'Method not allowed')
+            data = dict (data = data)
+        except Roundup_Error as err:
+            code = err.status
+            data = dict (error = dict (status = code, msg = str (err)))
+        return self.response \
+            (request, code, json.dumps (data), 'application/json')
+    # end def roundup
+
+    def qsls (self, qsl_type, received, since = None):
+        """ QSL and QSO of the given qsl_type that were sent (or
+            received) since the given date.
+        """
+        store = self.store
+        with store.lock:
+            qt   = store.lookup ('qsl_type', qsl_type)
+            date = 'date_recv' if received else 'date_sent'
+            for id in sorted (store.index ('qsl', 'qsl_type').get (qt, ())):
+                qsl = store.nodes ['qsl'][id]
+                if not qsl [date] or (since and qsl [date] < since):
+                    continue
+                qso = store.nodes ['qso'][qsl ['qso']]
+                yield qsl, qso
+    # end def qsls
+
+    def adif_record (self, qso, qsl, received, lotw = False):
+        store = self.store
+        fmt   = store.date_format
+        start = datetime.strptime (qso ['qso_start'], fmt)
+        mode  = store.nodes ['ham_mode'][qso ['mode']]
+        own   = store.nodes ['ham_call'][qso ['owner']]
+        band  = store.nodes ['ham_band'][qso ['band']]['name']
+        r = \
+            [ adif_field ('CALL', qso ['call'])
+            , adif_field ('BAND', band.upper ())
+            , adif_field ('MODE', mode ['adif_mode'])
+            ]
+        if mode ['adif_submode']:
+            r.append (adif_field ('SUBMODE', mode ['adif_submode']))
+        r.append (adif_field ('QSO_DATE', start.strftime ('%Y%m%d')))
+        if lotw:
+            r.append (adif_field ('TIME_ON', start.strftime ('%H%M%S')))
+            r.append (adif_field ('STATION_CALLSIGN', own ['call']))
+            r.append (adif_field ('MY_GRIDSQUARE', own ['gridsquare']))
+        else:
+            r.append (adif_field ('TIME_ON', start.strftime ('%H%M')))
+            r.append (adif_field ('RST_SENT', qso ['rst_rcvd']))
+        if received:
+            rdate = datetime.strptime (qsl ['date_recv'], fmt)
+            r.append (adif_field ('QSL_RCVD', 'Y'))
+            r.append (adif_field ('QSLRDATE', rdate.strftime ('%Y%m%d')))
+            r.append (adif_field ('GRIDSQUARE', qso ['gridsquare']))
+            if lotw:
+                dxcc = store.nodes ['dxcc_entity'][qso ['dxcc_entity']]
+                r.append (adif_field ('DXCC', int (dxcc ['code'])))
+                r.append (adif_field ('CQZ', qso ['cq_zone']))
+                r.append (adif_field ('ITUZ', qso ['itu_zone']))
+        return ''.join (r) + '<eor>\n'
+    # end def adif_record
+
+    def lotw (self, request, name, query):
+        received = query.get ('qso_qsl') == 'yes'
+        key = 'lotw-qsl' if received else 'lotw-qso'
+        if key in self.recorded:
+            body = self.recorded [key]
+        else:
+            since = query.get ('qso_qsorxsince')
+            if received:
+                since = query.get ('qso_qslsince')
+            r = ['ARRL Logbook of the World Status Report\n']
+            r.append (adif_field ('PROGRAMID', 'LoTW') + '\n<eoh>\n')
+            for qsl, qso in self.qsls ('LOTW', received, since):
+                r.append (self.adif_record (qso, qsl, received, lotw = True))
+            body = ''.join (r)
+        return self.response \
+            (request, 200, body, 'application/x-arrl-adif; charset=utf-8')
+    # end def lotw
+
+    def eqsl (self, request, name, query):
+        html = 'text/html; charset=utf-8'
+        if name in ('DownloadInBox.cfm', 'DownloadADIF.cfm'):
+            received = name == 'DownloadInBox.cfm'
+            key = 'eqsl-inbox' if received else 'eqsl-outbox'
+            if key not in self.recorded:
+                since = query.get ('RcvdSince')
+                if since:
+                    since = datetime.strptime (since, '%Y%m%d%H%M')
+                    since = since.strftime (self.store.date_format)
+                r = ['ADIF 3 Export from eQSL.cc\n']
+                r.append (adif_field ('PROGRAMID', 'eQSL.cc') + '\n<EOH>\n')
+                for qsl, qso in self.qsls ('eQSL', received, since):
+                    r.append (self.adif_record (qso, qsl, received))
+                body = ''.join (r).encode ('utf-8')
+            else:
+                body = self.recorded [key]
+            fn = '%s.adi' % key
+            self.files [fn] = body
+            return self.response \
+                ( request, 200
+                , '<html><body>Your ADIF log file has been built.'
+                  '<a href="downloadedfiles/%s">%s</a></body></html>'
+                  % (fn, fn)
+                , html
+                )
+        if name in self.files:
+            return self.response \
+                (request, 200, self.files [name], 'text/plain; charset=utf-8')
+        if name == 'GeteQSL.cfm':
+            return self.response \
+                ( request, 200
+                , '<html><body><img src="/CFFileServlet/_cf_image/qsl.png">'
+                  '</body></html>'
+                , html
+                )
+        if name == 'qsl.png':
+            card = self.recorded.get ('eqsl-card', self.png)
+            return self.response (request, 200, card, 'image/png')
+        if name == 'DisplayLastUploadDate.cfm':
+            return self.response \
+                ( request, 200
+                , '<html><body>\nYour last ADIF upload was '
+                  '01-Jan-2024 at 12:00:00 PM UTC\n</body></html>'
+                , html
+                )
+        return self.response (request, 404, 'Not found', html)
+    # end def eqsl
+
+# end class Standin_Adapter
+
+def main ():
+    recorded_names = \
+        ( 'lotw-qso.adi', 'lotw-qsl.adi', 'eqsl-inbox.adi', 'eqsl-outbox.adi'
+        , 'eqsl-card.png'
+        )
+    cmd = ArgumentParser ()
+    cmd.add_argument \
+        ( "program"
+        , help    = "Program to run against the stand-in, "
+                    "qso-import or qsl-export"
+        )
+    cmd.add_argument \
+        ( "args"
+        , help    = "Arguments of the program"
+        , nargs   = REMAINDER
+        )
+    cmd.add_argument \
+        ( "-l", "--latency"
+        , help    = "Latency of each request in seconds, default=%(default)s"
+        , type    = float
+        , default = 0.0
+        )
+    cmd.add_argument \
+        ( "-n", "--qsos"
+        , help    = "Number of synthetic QSOs, default=%(default)s"
+        , type    = int
+        , default = 1000
+        )
+    cmd.add_argument \
+        ( "-r", "--recorded"
+        , help    = "Directory with recorded responses, file names are "
+                    + ', '.join (recorded_names)
+        )
+    cmd.add_argument \
+        ( "-s", "--seed"
+        , help    = "Random seed for synthetic data, default=%(default)s"
+        , type    = int
+        , default = 42
+        )
+    args = cmd.parse_args ()
+    recorded = {}
+    if args.recorded:
+        for fn in recorded_names:
+            path = os.path.join (args.recorded, fn)
+            if os.path.exists (path):
+                with open (path, 'rb') as f:
+                    recorded [os.path.splitext (fn) [0]] = f.read ()
+    store   = Roundup_Store.synthetic (args.qsos, seed = args.seed)
+    adapter = Standin_Adapter (store, args.latency, recorded)
+    url     = 'http://standin/qso/'
+    if args.program == 'qso-import':
+        from hamradio.dbimport import main as program
+        # eQSL rate limit for retrieving cards does not apply here
+        from hamradio.eqsl     import EQSL_Query
+        EQSL_Query.qslcard_delay = 0
+        argv = \
+            [ '-U', url, '-p', 'standin'
+            , '--lotw-password', 'standin', '--eqsl-password', 'standin'
+            ]
+    elif args.program == 'qsl-export':
+        from hamradio.qslcard import main as program
+        argv = ['-U', url, '-p', 'standin']
+    else:
+        print ("Invalid program: %s" % args.program, file = sys.stderr)
+        sys.exit (1)
+    sys.argv = [args.program] + argv + args.args
+    t = time.perf_counter ()
+    try:
+        with adapter.install ():
+            program ()
+    finally:
+        print \
+            ( "Elapsed: %.3fs" % (time.perf_counter () - t)
+            , file = sys.stderr
+            )
+        print (adapter.stats.as_table (), file = sys.stderr)
+# end def main
+
+if __name__ == '__main__':
+    main ()
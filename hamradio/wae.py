@@ -0,0 +1,249 @@
+#!/usr/bin/python3
+# Copyright (C) 2026 Dr. Ralf Schlatterbeck Open Source Consulting.
+# Reichergasse 131, A-3411 Weidling.
+# Web: http://www.runtux.com Email: office@runtux.com
+# ****************************************************************************
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS
+# IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED
+# TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A
+# PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED
+# TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ****************************************************************************
+
+import io
+import os
+import sys
+from re                import compile as rc
+from datetime          import datetime
+from argparse          import ArgumentParser
+from bs4               import BeautifulSoup
+from hamradio.cty      import CTY
+from hamradio.interval import Interval_Index, as_datetime
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Source:
+# https://www.darc.de/en/der-club/referate/committee-dx/diplome/wae-award/wae-country-list/
+
+re_date = rc (r'([A-Z][a-z]+)\s*([0-9]{1,2}),\s*([0-9]{4})')
+
+def parse_date (s, end = False):
+    """ Parse dates in the format of the WAE list, None if empty
+    >>> parse_date ('Sep17, 1973')
+    datetime.datetime(1973, 9, 17, 0, 0)
+    >>> parse_date ('Oct 2, 1990', end = True)
+    datetime.datetime(1990, 10, 2, 23, 59, 59)
+    >>> print (parse_date (''))
+    None
+    """
+    m = re_date.search (s)
+    if not m:
+        return None
+    dt = datetime.strptime ('%s %s %s' % m.groups (), '%b %d %Y')
+    if end:
+        dt = dt.replace (hour = 23, minute = 59, second = 59)
+    return dt
+# end def parse_date
+
+class WAE_Entity:
+
+    def __init__ (self, prefix, name, since = None, until = None, index = 0):
+        self.prefix  = prefix.upper ()
+        self.name    = name
+        self.since   = since
+        self.until   = until
+        self.index   = index
+        self.deleted = until is not None
+    # end def __init__
+
+    def valid (self, date):
+        """ True if entity is valid at date
+        """
+        if self.since and date < self.since:
+            return False
+        if self.until and date > self.until:
+            return False
+        return True
+    # end def valid
+
+    def __str__ (self):
+        r = ['%-5s %s' % (self.prefix, self.name)]
+        if self.since:
+            r.append ('since %s' % self.since.strftime ('%Y-%m-%d'))
+        if self.until:
+            r.append ('until %s' % self.until.strftime ('%Y-%m-%d'))
+        return ' '.join (r)
+    # end def __str__
+    __repr__ = __str__
+
+# end class WAE_Entity
+
+class WAE_List:
+    """ Parse the official WAE country list of the DARC.
+        The first table contains the current entities with an optional
+        'valid since' date, the second the deleted entities.
+    """
+
+    data = os.path.join \
+        (os.path.dirname (__file__), 'data', 'wae-country-list.html')
+
+    def __init__ (self, filename = data):
+        self.filename = filename
+        self.entities = []
+        self.current  = {}
+        self.deleted  = []
+        with io.open (filename, 'r', encoding = 'utf-8') as f:
+            soup = BeautifulSoup (f.read (), 'html.parser')
+        for table in soup.find_all ('table'):
+            for row in table.find_all ('tr'):
+                cells = [c.get_text (' ', strip = True)
+                         for c in row.find_all (['td', 'th'])
+                        ]
+                if len (cells) < 3 or cells [0] == 'Prefix':
+                    continue
+                since = parse_date (cells [2])
+                until = None
+                if len (cells) > 3:
+                    until = parse_date (cells [3], end = True)
+                e = WAE_Entity \
+                    (cells [0], cells [1], since, until, len (self.entities))
+                self.entities.append (e)
+                if e.deleted:
+                    self.deleted.append (e)
+                else:
+                    self.current [e.prefix] = e
+    # end def __init__
+
+# end class WAE_List
+
+class WAE:
+    """ Look up WAE entities of callsigns.
+        Prefix matching is done with the CTY tables (cty.dat contains
+        the WAE-only entities like Sicily or Shetland Islands), each
+        european CTY entity is mapped to a WAE entity via its primary
+        prefix. So lookups cost the same as a CTY lookup and batch
+        lookups use the compiled CTY arrays. Deleted WAE entities are
+        only found for lookups with a QSO date, they are kept in an
+        interval index by prefix.
+    """
+
+    def __init__ (self, cty = None, wae_list = None):
+        self.cty      = cty or CTY (CTY.data)
+        self.wae_list = wae_list or WAE_List ()
+        self.table    = None
+        self.deleted  = {}
+        self.del_max  = 0
+        for e in self.wae_list.deleted:
+            if e.prefix not in self.deleted:
+                self.deleted [e.prefix] = Interval_Index ()
+            self.deleted [e.prefix].add (e.since, e.until, e)
+            self.del_max = max (self.del_max, len (e.prefix))
+        self._compile ()
+    # end def __init__
+
+    def _compile (self):
+        """ Map CTY entities of the current CTY table to WAE entities.
+            Recomputed when the CTY object was reloaded.
+        """
+        table = self.cty.table
+        if table is self.table:
+            return
+        current = self.wae_list.current
+        by_name = {}
+        for e in table.entities:
+            if e.continent != 'EU':
+                continue
+            pfx = e.prefix.lstrip ('*').upper ()
+            if pfx not in current:
+                pfx = pfx.rstrip ('0123456789')
+            if pfx in current:
+                by_name [e.name] = current [pfx]
+        self.by_name = by_name
+        if np is not None:
+            self.map = np.array \
+                ( [ by_name [e.name].index if e.name in by_name else -1
+                    for e in table.entities
+                  ]
+                + [-1]
+                , dtype = np.int32
+                )
+        self.table = table
+    # end def _compile
+
+    def callsign_lookup (self, callsign, date = None):
+        """ Return the WAE entity for callsign or None.
+            If the date of the QSO is given, deleted entities are
+            considered and entities not valid at that date are not
+            returned.
+        """
+        self._compile ()
+        if date is not None:
+            date = as_datetime (date)
+            for n in reversed (range (self.del_max)):
+                idx = self.deleted.get (callsign [:n+1])
+                if idx is not None:
+                    e = idx.lookup (date)
+                    if e is not None:
+                        return e
+        name = self.cty.callsign_lookup (callsign)
+        e    = self.by_name.get (name)
+        if e is not None and (date is None or e.valid (date)):
+            return e
+    # end def callsign_lookup
+
+    def batch_lookup (self, callsigns, workers = None, **kw):
+        """ Look up many callsigns (sequence, numpy array or arrow
+            column), returns a numpy array of indeces into
+            self.wae_list.entities, -1 for non-WAE callsigns.
+            Deleted entities are not considered.
+        """
+        self._compile ()
+        entity, cq, itu = self.cty.batch_lookup (callsigns, workers, **kw)
+        return self.map [entity]
+    # end def batch_lookup
+
+# end class WAE
+
+def main ():
+    cmd = ArgumentParser ()
+    cmd.add_argument \
+        ( "callsign"
+        , help    = "Callsign to look up"
+        , nargs   = '*'
+        )
+    cmd.add_argument \
+        ( "-d", "--date"
+        , help    = "Date of QSO, if given, deleted entities valid at that "
+                    "date are also found"
+        )
+    args = cmd.parse_args ()
+    wae  = WAE ()
+    for cs in args.callsign:
+        e = wae.callsign_lookup (cs, args.date)
+        if e is None:
+            print ("%s: NOT FOUND" % cs)
+        else:
+            print ("%s: %s" % (cs, e.name))
+# end def main
+
+if __name__ == '__main__':
+    main ()
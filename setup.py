@@ -45,6 +45,7 @@ setup \
     , author           = "Ralf Schlatterbeck"
     , author_email     = "rsc@runtux.com"
     , install_requires = ['rsclib', 'requests', 'bs4']
+    , extras_require   = dict (numpy = ['numpy'])
     , packages         = ['hamradio']
     , package_data     = dict
         (hamradio = ['data/*.txt', 'data/*.dat', 'data/*.html'])
@@ -53,8 +54,11 @@ setup \
     , entry_points     = dict
         ( console_scripts =
             [ 'callsign_lookup=hamradio.dxcc:main'
+            , 'cty-server=hamradio.ctyserver:main'
+            , 'nmea-locator=hamradio.nmea:main'
             , 'qsl-export=hamradio.qslcard:main'
             , 'qso-import=hamradio.dbimport:main'
+            , 'qso-standin=hamradio.standin:main'
             ]
         )
     , url              = 'https://github.com/schlatterbeck/hamradio'